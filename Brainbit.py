@@ -1,23 +1,38 @@
 import sys
 import os
-import pandas as pd
-import numpy as np
-import mne
 from PyQt5.QtWidgets import QApplication, QMainWindow, QFileDialog, QVBoxLayout, QWidget, QComboBox, QPushButton, \
-    QMessageBox, QHBoxLayout, QRadioButton, QButtonGroup, QLabel, QLineEdit
-from PyQt5.QtGui import QCursor
-from PyQt5.QtCore import Qt, QTranslator
+    QMessageBox, QHBoxLayout, QRadioButton, QButtonGroup, QLabel, QLineEdit, QProgressBar, QListWidget, QListWidgetItem, QInputDialog, \
+    QDockWidget, QCheckBox, QShortcut
+from PyQt5.QtGui import QCursor, QKeySequence
+from PyQt5.QtCore import Qt, QTimer, QTranslator
 
 # Establece la configuración regional a español (cambia 'es' según tu configuración)
 os.environ["LANG"] = "es_ES.UTF-8"
 
-# Importa Matplotlib después de configurar la configuración regional
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5 import NavigationToolbar2QT as NavigationToolbar
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
 from qtawesome import icon
 
+# Al inicio sólo se importa lo necesario para mostrar la ventana. Matplotlib
+# (después de configurar la región) se importa al armar el área de gráficos,
+# y mne, scipy y los módulos de análisis se precargan en segundo plano
+# (WARM_UP_MODULES) y se importan en los métodos que los usan.
+from disk_cache import DiskCache
+from session import Session
+from telemetry import SINGLE_PROFILER, TELEMETRY, format_bytes, stage
+from workers import JobRunner, preload_modules
+
+WARM_UP_MODULES = ['numpy', 'scipy.signal', 'mne', 'mne.io', 'mne.filter', 'signal_model', 'spectral',
+                   'band_power', 'decimation', 'streaming', 'export']
+
+# Épocas de 4 s con paso de 2 s para el gráfico de potencia por bandas
+BAND_EPOCH = (4.0, 2.0)
+
+# Transmisión en vivo: cuadros por segundo y segundos visibles en el gráfico
+STREAM_FPS = 30
+STREAM_SECONDS = 10.0
+
+# Refresco del panel de perfil (ms)
+TELEMETRY_REFRESH_MS = 500
+
 class BrainBit(QMainWindow):
     def __init__(self):
             super().__init__()
@@ -31,9 +46,6 @@ class BrainBit(QMainWindow):
             y = (screen_geometry.height() - self.height()) // 2
             self.move(x, y)
 
-            plt.rcParams.update({'font.size': 10, 'font.weight': 'normal'})
-            plt.rcParams['lines.color'] = color="#060270"
-
             # Contenedor principal
             main_layout = QVBoxLayout()
 
@@ -48,17 +60,36 @@ class BrainBit(QMainWindow):
             self.load_button.setToolTip("Haz clic para cargar un archivo EDF")  # Agregado el tooltip
             button_container.addWidget(self.load_button)
 
+            # Transmisión en vivo (reproduce un EDF como si fuera el dispositivo)
+            self.stream_button = QPushButton(icon('fa.play'), ' En vivo', self)
+            self.stream_button.setCursor(QCursor(Qt.PointingHandCursor))
+            self.stream_button.clicked.connect(self.start_stream)
+            self.stream_button.setStyleSheet("background-color: #e67e22; color: black; font-weight: bold;")
+            self.stream_button.setToolTip("Reproduce un archivo EDF en tiempo real, como si llegara del dispositivo")
+            button_container.addWidget(self.stream_button)
+
+            self.velocidad_selector = QComboBox(self)
+            self.velocidad_selector.addItems(['1x', '2x', '5x', '10x'])
+            self.velocidad_selector.setToolTip("Velocidad de reproducción de la transmisión en vivo")
+            button_container.addWidget(self.velocidad_selector)
+
             # Grupo de botones de tipo de gráfico
             self.chart_type_group = QButtonGroup(self)
             self.muestra_button = QRadioButton("Amplitud vs Muestra", self)
             self.tiempo_button = QRadioButton("Amplitud vs Tiempo", self)
             self.frequencia_button = QRadioButton("Amplitud vs Frequencia", self)
             self.amplitud_button = QRadioButton("Amplitud vs Tiempo y Frequencia", self)
+            self.bandas_button = QRadioButton("Potencia por Bandas", self)
+            self.apilado_button = QRadioButton("Todos los Canales", self)
+            self.superponer_button = QRadioButton("Superponer Archivos", self)
 
             self.chart_type_group.addButton(self.muestra_button)
             self.chart_type_group.addButton(self.tiempo_button)
             self.chart_type_group.addButton(self.frequencia_button)
             self.chart_type_group.addButton(self.amplitud_button)
+            self.chart_type_group.addButton(self.bandas_button)
+            self.chart_type_group.addButton(self.apilado_button)
+            self.chart_type_group.addButton(self.superponer_button)
             self.chart_type_group.setExclusive(True)
 
             # Aplicar estilos a los radio buttons
@@ -66,11 +97,25 @@ class BrainBit(QMainWindow):
             self.tiempo_button.setStyleSheet("color: black; font-weight: bold;")  # Ajusta según tus preferencias
             self.frequencia_button.setStyleSheet("color: black; font-weight: bold;")  # Ajusta según tus preferencias
             self.amplitud_button.setStyleSheet("color: black; font-weight: bold;")  # Ajusta según tus preferencias
+            self.bandas_button.setStyleSheet("color: black; font-weight: bold;")  # Ajusta según tus preferencias
+            self.apilado_button.setStyleSheet("color: black; font-weight: bold;")  # Ajusta según tus preferencias
+            self.superponer_button.setStyleSheet("color: black; font-weight: bold;")  # Ajusta según tus preferencias
 
             button_container.addWidget(self.muestra_button)
             button_container.addWidget(self.tiempo_button)
             button_container.addWidget(self.frequencia_button)
             button_container.addWidget(self.amplitud_button)
+            button_container.addWidget(self.bandas_button)
+            button_container.addWidget(self.apilado_button)
+            button_container.addWidget(self.superponer_button)
+
+            # Botón de exportación (señal filtrada, PSD y características en formato columnar)
+            self.export_button = QPushButton(icon('fa.download'), ' Exportar', self)
+            self.export_button.setCursor(QCursor(Qt.PointingHandCursor))
+            self.export_button.clicked.connect(self.export_data)
+            self.export_button.setStyleSheet("background-color: #9b59b6; color: black; font-weight: bold;")
+            self.export_button.setToolTip("Exporta la señal filtrada, su espectro y la potencia por bandas")
+            button_container.addWidget(self.export_button)
 
             # Botón de ayuda
             self.help_button = QPushButton(icon('fa.question-circle'), ' Ayuda', self)
@@ -113,6 +158,16 @@ class BrainBit(QMainWindow):
             self.frecuencia_max_text.setInputMask("000")
             self.frecuencia_max_text.setToolTip("Entre con la frecuencia maxima para el grafico (Hz)")  # Agregar tooltip
 
+            self.ventana_label = QLabel("Ventana (ms): ")
+            self.ventana_text = QLineEdit("1000")
+            self.ventana_text.setInputMask("00000")
+            self.ventana_text.setToolTip("Entre con la duración de cada ventana del espectrograma (ms)")  # Agregar tooltip
+
+            self.paso_label = QLabel("Paso (ms): ")
+            self.paso_text = QLineEdit("250")
+            self.paso_text.setInputMask("00000")
+            self.paso_text.setToolTip("Entre con el desplazamiento entre ventanas del espectrograma (ms)")  # Agregar tooltip
+
             self.loading_chart_label = QLabel("Cargando el grafico. Espere por favor!")
             self.loading_chart_label.setFixedHeight(25)
             font1 = self.loading_chart_label.font()
@@ -120,8 +175,20 @@ class BrainBit(QMainWindow):
             font1.setPointSize(8)
             self.loading_chart_label.setFont(font1)
 
-            load_layout = QVBoxLayout()
+            self.progress_bar = QProgressBar()
+            self.progress_bar.setFixedHeight(15)
+            self.progress_bar.hide()
+
+            self.cancel_button = QPushButton(icon('fa.times'), ' Cancelar', self)
+            self.cancel_button.setCursor(QCursor(Qt.PointingHandCursor))
+            self.cancel_button.clicked.connect(self.cancel_jobs)
+            self.cancel_button.setToolTip("Cancelar la operación en curso")
+            self.cancel_button.hide()
+
+            load_layout = QHBoxLayout()
             load_layout.addWidget(self.loading_chart_label)
+            load_layout.addWidget(self.progress_bar)
+            load_layout.addWidget(self.cancel_button)
             self.loading_chart_label.setAlignment(Qt.AlignCenter)
             self.loading_chart_label.hide()
 
@@ -133,11 +200,17 @@ class BrainBit(QMainWindow):
             item_container.addWidget(self.frecuencia_min_text)            
             item_container.addWidget(self.frecuencia_max_label)
             item_container.addWidget(self.frecuencia_max_text)
+            item_container.addWidget(self.ventana_label)
+            item_container.addWidget(self.ventana_text)
+            item_container.addWidget(self.paso_label)
+            item_container.addWidget(self.paso_text)
 
             self.tiempo_min_text.returnPressed.connect(self.return_pressed)
             self.tiempo_max_text.returnPressed.connect(self.return_pressed)
             self.frecuencia_min_text.returnPressed.connect(self.return_pressed)
             self.frecuencia_max_text.returnPressed.connect(self.return_pressed)
+            self.ventana_text.returnPressed.connect(self.return_pressed)
+            self.paso_text.returnPressed.connect(self.return_pressed)
             self.range_changed = False
 
             item_layout.addLayout(item_container)
@@ -145,29 +218,35 @@ class BrainBit(QMainWindow):
             main_layout.addLayout(load_layout)
             self.hide_item_range()
     
-            # Configuración de la figura de Matplotlib
-            self.figure = Figure()
-            self.canvas = FigureCanvas(self.figure)
-            self.toolbar = NavigationToolbar(self.canvas, self)
-
-            # Cambia los tooltips de la barra de herramientas a español
-            self.toolbar.actions()[0].setToolTip("Inicio")
-            self.toolbar.actions()[1].setToolTip("Atrás")
-            self.toolbar.actions()[2].setToolTip("Adelante")
-            self.toolbar.actions()[4].setToolTip("Mover")
-            self.toolbar.actions()[5].setToolTip("Agrandar")
-            self.toolbar.actions()[6].setToolTip("Configurar Subplots")
-            self.toolbar.actions()[7].setToolTip("Personalizar ejes, curva e imagen")
-            self.toolbar.actions()[9].setToolTip("Guardar")
-
-
-            main_layout.addWidget(self.toolbar)
-            main_layout.addWidget(self.canvas)
-
-            # Configuración de la traducción para Matplotlib
-            translator = QTranslator()
-            translator.load("es", "translations")
-            QApplication.installTranslator(translator)
+            # Panel de sesión: archivos abiertos a la vez, a la izquierda del gráfico
+            session_layout = QVBoxLayout()
+            self.session_label = QLabel("Archivos abiertos")
+            self.session_label.setFont(font1)
+            self.session_list = QListWidget(self)
+            self.session_list.setFixedWidth(220)
+            self.session_list.setToolTip("Haz clic en un archivo para volver a él sin recargarlo")
+            self.session_list.itemClicked.connect(self.session_selected)
+            self.close_file_button = QPushButton(icon('fa.times'), ' Cerrar archivo', self)
+            self.close_file_button.setCursor(QCursor(Qt.PointingHandCursor))
+            self.close_file_button.clicked.connect(self.close_recording)
+            self.close_file_button.setToolTip("Quita de la sesión el archivo seleccionado")
+            self.session_memory_label = QLabel("")
+            session_layout.addWidget(self.session_label)
+            session_layout.addWidget(self.session_list)
+            session_layout.addWidget(self.session_memory_label)
+            session_layout.addWidget(self.close_file_button)
+
+            # La figura de Matplotlib se crea después de mostrar la ventana (build_plot_area)
+            self.figure = None
+            self.plot_layout = QVBoxLayout()
+            self.plot_placeholder = QLabel("Preparando el área de gráficos...")
+            self.plot_placeholder.setAlignment(Qt.AlignCenter)
+            self.plot_layout.addWidget(self.plot_placeholder)
+
+            content_layout = QHBoxLayout()
+            content_layout.addLayout(session_layout)
+            content_layout.addLayout(self.plot_layout)
+            main_layout.addLayout(content_layout)
 
             # Establecer el diseño principal
             central_widget = QWidget()
@@ -175,6 +254,34 @@ class BrainBit(QMainWindow):
             self.setCentralWidget(central_widget)
 
             self.selected_column = None
+            self.signal = None
+            self.file_path = None
+            self.filter_params = (0.1, 100.0)
+            self.stream = None
+            self.stream_plot = None
+            self.stacked_view = None
+            self.pyramid_path = None  # archivo cuya pirámide se arma en segundo plano
+            # Matplotlib sólo guarda una referencia débil al callback de zoom de cada línea
+            # decimada: sin conservarlas aquí dejarían de actualizarse al desplazar
+            self.decimated_lines = []
+
+            # Refresco del gráfico en vivo a cuadros por segundo fijos
+            self.stream_timer = QTimer(self)
+            self.stream_timer.setInterval(1000 // STREAM_FPS)
+            self.stream_timer.timeout.connect(self.update_stream)
+
+            # Carga, filtrado y análisis espectral se ejecutan fuera del hilo de la interfaz
+            self.jobs = JobRunner(self)
+
+            # Caché en disco de señales filtradas; sin ella todo se recalcula en cada carga
+            try:
+                self.cache = DiskCache()
+            except OSError:
+                self.cache = None
+
+            # Archivos abiertos, con la memoria acotada: los menos usados pasan a disco
+            self.session = Session(self.cache)
+            self.refresh_session_panel()
 
             # Configuración de botones y señales
             self.muestra_button.setChecked(False)
@@ -184,13 +291,83 @@ class BrainBit(QMainWindow):
             self.tiempo_button.setEnabled(False)
             self.frequencia_button.setEnabled(False)
             self.amplitud_button.setEnabled(False)
+            self.bandas_button.setEnabled(False)
+            self.apilado_button.setEnabled(False)
+            self.superponer_button.setEnabled(False)
             self.chart_selector.setEnabled(False)
             self.chart_type_group.buttonClicked.connect(self.plot_chart)
             self.chart_selector.currentIndexChanged.connect(self.plot_chart)
 
+            # Panel de perfil (F12): tiempos por etapa de cada interacción; se arma al abrirlo
+            self.telemetry_dock = None
+            self.telemetry_shown = 0
+            self.telemetry_timer = QTimer(self)
+            self.telemetry_timer.setInterval(TELEMETRY_REFRESH_MS)
+            self.telemetry_timer.timeout.connect(self.refresh_telemetry)
+            self.telemetry_shortcut = QShortcut(QKeySequence('F12'), self)
+            self.telemetry_shortcut.activated.connect(self.toggle_telemetry_panel)
+
+            self.warm_up = None
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        # Lo pesado se termina de preparar después de que la ventana se pintó por primera vez
+        if self.warm_up is None:
+            self.warm_up = False
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        self.warm_up = preload_modules(WARM_UP_MODULES)
+        self.build_plot_area()
+        if TELEMETRY.enabled:
+            self.toggle_telemetry_panel()
+
+    def build_plot_area(self):
+        if self.figure is not None:
+            return
+        import matplotlib
+        from matplotlib.backends.backend_qt5 import NavigationToolbar2QT as NavigationToolbar
+        from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+        from matplotlib.figure import Figure
+
+        matplotlib.rcParams.update({'font.size': 10, 'font.weight': 'normal'})
+        matplotlib.rcParams['lines.color'] = "#060270"
+
+        # Configuración de la figura de Matplotlib
+        self.figure = Figure()
+        self.canvas = FigureCanvas(self.figure)
+        self.toolbar = NavigationToolbar(self.canvas, self)
+
+        # Cambia los tooltips de la barra de herramientas a español
+        self.toolbar.actions()[0].setToolTip("Inicio")
+        self.toolbar.actions()[1].setToolTip("Atrás")
+        self.toolbar.actions()[2].setToolTip("Adelante")
+        self.toolbar.actions()[4].setToolTip("Mover")
+        self.toolbar.actions()[5].setToolTip("Agrandar")
+        self.toolbar.actions()[6].setToolTip("Configurar Subplots")
+        self.toolbar.actions()[7].setToolTip("Personalizar ejes, curva e imagen")
+        self.toolbar.actions()[9].setToolTip("Guardar")
+
+        self.plot_layout.removeWidget(self.plot_placeholder)
+        self.plot_placeholder.deleteLater()
+        self.plot_layout.addWidget(self.toolbar)
+        self.plot_layout.addWidget(self.canvas)
+
+        # Configuración de la traducción para Matplotlib
+        self.translator = QTranslator()
+        self.translator.load("es", "translations")
+        QApplication.installTranslator(self.translator)
+
     def hide_item_range(self):
         self.hide_tiempo_range()
         self.hide_frecuencia_range()
+        self.hide_spectrogram_params()
+
+    def hide_spectrogram_params(self):
+        self.ventana_label.hide()
+        self.ventana_text.hide()
+        self.paso_label.hide()
+        self.paso_text.hide()
         
     def hide_frecuencia_range(self):
         self.frecuencia_min_label.hide()
@@ -216,58 +393,361 @@ class BrainBit(QMainWindow):
 
             if file_path:
                 if file_path.endswith('.edf'):
-                    # Cargar el archivo .edf
-                    self.raw_data = mne.io.read_raw_edf(file_path, preload=True, stim_channel='auto', verbose='DEBUG')
-
-                    # Aplicar un filtro después de cargar los datos
-                    self.raw_data.filter(l_freq=0.1, h_freq=100.0)
-                    
-                    # Obtener los nombres de los canales
-                    nombres_canales = self.raw_data.ch_names
-
-                    self.chart_selector.setEnabled(True)
-                    self.chart_selector.clear()
-
-                    # Conservar los nombres con la primera letra en mayúscula en el ComboBox
-                    self.chart_selector.addItems([col for col in nombres_canales])
-
-                    self.figure.clear()  # Limpiar la figura al cargar un nuevo CSV
-                    self.canvas.draw()
-                    self.chart_selector.setEditText("Seleccione una columna")  # Restaurar el texto "Seleccione una columna"
-
-                    self.chart_type_group.setExclusive(False)
-                    self.muestra_button.setChecked(False)
-                    self.tiempo_button.setChecked(False)
-                    self.frequencia_button.setChecked(False)
-                    self.muestra_button.setEnabled(True)
-                    self.tiempo_button.setEnabled(True)
-                    self.frequencia_button.setEnabled(True)
-                    self.amplitud_button.setEnabled(True)
-                    self.chart_type_group.setExclusive(True)
-                    
-                    self.hide_item_range()
-    
+                    self.start_load(file_path)
                 else:
                     raise Exception("El archivo seleccionado no es un archivo EDF.")
 
             else:
                 pass
         except Exception as e:
-            QMessageBox.critical(self, 'Error', str(e))
-            self.chart_selector.setEnabled(False)
-            self.muestra_button.setEnabled(False)
-            self.tiempo_button.setEnabled(False)
-            self.frequencia_button.setEnabled(False)
-            self.amplitud_button.setEnabled(False)
-            self.figure.clear()  # Limpiar la figura al cargar un nuevo EDF
+            self.load_failed(str(e))
+
+    def start_load(self, file_path):
+        from signal_model import open_edf
+
+        self.build_plot_area()
+        if file_path in self.session and self.session.get(file_path).filter_params == self.filter_params:
+            # Ya está abierto con el mismo filtro: basta con mostrarlo
+            self.activate_recording(file_path)
+            return
+        TELEMETRY.begin(f"cargar {os.path.basename(file_path)}")
+        # Un archivo nuevo invalida cualquier análisis pendiente del anterior
+        self.close_stream()
+        self.cancel_slots()
+        self.load_button.setEnabled(False)
+        self.show_busy("Cargando el archivo. Espere por favor!")
+        self.jobs.submit('load', open_edf, file_path, *self.filter_params, cache=self.cache,
+                         on_done=lambda result: self.load_finished(file_path, result),
+                         on_error=self.load_failed, on_progress=self.update_progress)
+
+    def load_finished(self, file_path, result):
+        self.hide_busy()
+        self.load_button.setEnabled(True)
+        raw, signal = result
+        self.session.add(file_path, raw, signal, self.filter_params)
+        self.show_recording(file_path)
+        self.refresh_session_panel()
+
+    def activate_recording(self, file_path):
+        # Cambiar a un archivo ya abierto: no se decodifica ni se filtra nada
+        TELEMETRY.begin(f"volver a {os.path.basename(file_path)}")
+        self.close_stream()
+        self.cancel_slots('analysis')
+        self.show_recording(file_path, keep_view=True)
+        self.refresh_session_panel()
+
+    def show_recording(self, file_path, keep_view=False):
+        from signal_model import finish_lazy_signal
+
+        recording = self.session.get(file_path)
+        self.file_path = file_path
+        self.signal = recording.signal
+
+        if self.signal.pyramids is None:
+            # Archivo abierto sin precargar: la vista general se prepara en segundo plano
+            self.show_busy("Preparando la vista general del archivo")
+            self.pyramid_path = file_path
+            self.jobs.submit('pyramid', finish_lazy_signal, self.signal, self.cache,
+                             on_done=lambda signal: self.pyramids_finished(file_path, signal),
+                             on_error=self.analysis_failed, on_progress=self.update_progress)
+
+        # Obtener los nombres de los canales
+        nombres_canales = self.signal.ch_names
+        canal_anterior = self.chart_selector.currentText()
+
+        self.chart_selector.blockSignals(True)
+        self.chart_selector.setEnabled(True)
+        self.chart_selector.clear()
+
+        # Conservar los nombres con la primera letra en mayúscula en el ComboBox
+        self.chart_selector.addItems([col for col in nombres_canales])
+        self.chart_selector.blockSignals(False)
+
+        if keep_view and self.chart_type_group.checkedButton() is not None:
+            # Mismo modo y mismo canal (si existe) con los datos del otro archivo
+            if canal_anterior in nombres_canales:
+                self.chart_selector.blockSignals(True)
+                self.chart_selector.setCurrentIndex(nombres_canales.index(canal_anterior))
+                self.chart_selector.blockSignals(False)
+            self.range_changed = False
+            self.plot_chart()
+            return
+
+        # La vista de todos los canales se conserva: sólo se le cambian los datos
+        apilado = self.apilado_button.isChecked() and self.stacked_view is not None
+        if not apilado:
+            self.close_stacked()
+            self.figure.clear()  # Limpiar la figura al cargar un nuevo CSV
+            self.decimated_lines = []
+            self.canvas.draw()
+        self.chart_selector.setEditText("Seleccione una columna")  # Restaurar el texto "Seleccione una columna"
+
+        self.chart_type_group.setExclusive(False)
+        self.muestra_button.setChecked(False)
+        self.tiempo_button.setChecked(False)
+        self.frequencia_button.setChecked(False)
+        self.amplitud_button.setChecked(False)
+        self.bandas_button.setChecked(False)
+        self.apilado_button.setChecked(apilado)
+        self.superponer_button.setChecked(False)
+        self.muestra_button.setEnabled(True)
+        self.tiempo_button.setEnabled(True)
+        self.frequencia_button.setEnabled(True)
+        self.amplitud_button.setEnabled(True)
+        self.bandas_button.setEnabled(True)
+        self.apilado_button.setEnabled(True)
+        self.superponer_button.setEnabled(True)
+        self.chart_type_group.setExclusive(True)
+
+        self.hide_item_range()
+        if apilado:
+            self.plot_chart()
+
+    def pyramids_finished(self, file_path, signal):
+        self.hide_busy()
+        self.session.update(file_path, signal)
+        self.refresh_session_panel()
+        if file_path != self.file_path:
+            return
+        self.signal = signal
+        if (self.muestra_button.isChecked() or self.tiempo_button.isChecked() or self.apilado_button.isChecked()
+                or self.superponer_button.isChecked()):
+            # Estos modos esperaban la pirámide (draw_pending_overview): el rango de tiempo no se tocó
+            self.plot_chart()
+
+    def load_failed(self, message):
+        self.hide_busy()
+        self.load_button.setEnabled(True)
+        QMessageBox.critical(self, 'Error', message)
+        self.reset_view()
+
+    def reset_view(self):
+        self.signal = None
+        self.file_path = None
+        self.chart_selector.setEnabled(False)
+        self.muestra_button.setEnabled(False)
+        self.tiempo_button.setEnabled(False)
+        self.frequencia_button.setEnabled(False)
+        self.amplitud_button.setEnabled(False)
+        self.bandas_button.setEnabled(False)
+        self.apilado_button.setEnabled(False)
+        self.superponer_button.setEnabled(False)
+        self.close_stacked()
+        self.figure.clear()  # Limpiar la figura al cargar un nuevo EDF
+        self.decimated_lines = []
+        self.canvas.draw()
+        self.chart_selector.setEditText("Seleccione una columna")  # Restaurar el texto "Seleccione una columna"
+        self.refresh_session_panel()
+
+    def refresh_session_panel(self):
+        self.session_list.clear()
+        for recording in self.session:
+            item = QListWidgetItem(f"{recording.name}\n  {recording.state} · {recording.nbytes / 1024 ** 2:.1f} MB")
+            item.setData(Qt.UserRole, recording.path)
+            self.session_list.addItem(item)
+            if recording.path == self.file_path:
+                self.session_list.setCurrentItem(item)
+        self.session_memory_label.setText(f"Memoria: {self.session.memory_bytes() / 1024 ** 2:.0f} de "
+                                          f"{self.session.max_bytes / 1024 ** 2:.0f} MB")
+        self.close_file_button.setEnabled(len(self.session) > 0)
+
+    def session_selected(self, item):
+        file_path = item.data(Qt.UserRole)
+        if file_path != self.file_path or self.stream is not None:
+            self.start_load(file_path)
+
+    def close_recording(self):
+        item = self.session_list.currentItem()
+        if item is None:
+            return
+        file_path = item.data(Qt.UserRole)
+        self.session.remove(file_path)
+        # Sólo se cancela lo que es del archivo cerrado: la carga de otro archivo sigue su curso
+        if self.jobs.is_busy('pyramid') and self.pyramid_path == file_path:
+            self.cancel_slots('pyramid')
+        if file_path != self.file_path:
+            self.hide_busy()
+            self.refresh_session_panel()
+            return
+        self.cancel_slots('analysis', 'export')
+        self.hide_busy()
+        restantes = list(self.session)
+        if restantes:
+            # Se pasa al archivo usado más recientemente
+            self.activate_recording(restantes[-1].path)
+        else:
+            self.reset_view()
+
+    def show_busy(self, message):
+        self.loading_chart_label.setText(message)
+        self.loading_chart_label.show()
+        self.progress_bar.setValue(0)
+        self.progress_bar.show()
+        self.cancel_button.show()
+
+    def hide_busy(self):
+        if not self.jobs.is_busy():
+            self.loading_chart_label.hide()
+            self.progress_bar.hide()
+            self.cancel_button.hide()
+
+    def update_progress(self, percent, message):
+        self.progress_bar.setValue(percent)
+        if message:
+            self.loading_chart_label.setText(message)
+
+    def cancel_jobs(self):
+        self.stop_stream()
+        self.cancel_slots()
+        self.hide_busy()
+
+    def cancel_slots(self, *slots):
+        # Todas las cancelaciones pasan por aquí: una carga cortada no llega a load_finished
+        # ni a load_failed, así que el botón de cargar se habilita acá (sin ranuras: todas)
+        if (not slots or 'load' in slots) and self.jobs.is_busy('load'):
+            self.load_button.setEnabled(True)
+        for slot in slots or [None]:
+            self.jobs.cancel(slot)
+
+    def run_analysis(self, fn, *args, on_done):
+        # Sólo el último análisis pedido llega a dibujarse
+        self.show_busy("Cargando el grafico. Espere por favor!")
+        self.jobs.submit('analysis', fn, *args, on_done=lambda result: self.analysis_finished(on_done, result),
+                         on_error=self.analysis_failed, on_progress=self.update_progress)
+
+    def analysis_finished(self, render, result):
+        self.hide_busy()
+        with stage('dibujo'):
+            self.figure.clear()
+            self.decimated_lines = []
+            render(result)
             self.canvas.draw()
-            self.chart_selector.setEditText("Seleccione una columna")  # Restaurar el texto "Seleccione una columna"
+
+    def analysis_failed(self, message):
+        self.hide_busy()
+        QMessageBox.critical(self, 'Error', f"Error al procesar las columnas: {message}")
+
+    def start_stream(self):
+        from streaming import EdfReplaySource, LiveStream
+
+        self.build_plot_area()
+        file_path = QFileDialog.getOpenFileName(self, 'Seleccionar archivo EDF a reproducir', filter="Archivos EDF (*.edf)")[0]
+        if not file_path:
+            return
+        try:
+            source = EdfReplaySource(file_path, speed=float(self.velocidad_selector.currentText().rstrip('x')))
+        except Exception as e:
+            self.load_failed(str(e))
+            return
+
+        # La transmisión reemplaza al archivo abierto
+        TELEMETRY.begin(f"en vivo {os.path.basename(file_path)}")
+        self.close_stream()
+        self.close_stacked()
+        self.cancel_slots()
+        self.signal = None
+        self.file_path = None
+        self.refresh_session_panel()
+        self.stream = LiveStream(source.sfreq, source.ch_names, STREAM_SECONDS, *self.filter_params)
+
+        self.chart_selector.blockSignals(True)
+        self.chart_selector.setEnabled(True)
+        self.chart_selector.clear()
+        self.chart_selector.addItems(source.ch_names)
+        self.chart_selector.blockSignals(False)
+
+        self.chart_type_group.setExclusive(False)
+        for boton in self.chart_type_group.buttons():
+            boton.setChecked(False)
+            boton.setEnabled(False)
+        self.chart_type_group.setExclusive(True)
+        self.hide_item_range()
+
+        self.show_busy("Transmisión en vivo")
+        self.jobs.submit('stream', source.run, self.stream.push, on_done=lambda _: self.stop_stream(),
+                         on_error=self.stream_failed, on_progress=self.update_progress)
+        self.draw_stream()
+        self.stream_timer.start()
+
+    def draw_stream(self):
+        from streaming import StreamPlot
+
+        if self.stream_plot is not None:
+            self.stream_plot.remove()
+        self.figure.clear()
+        self.decimated_lines = []
+        self.stream_plot = StreamPlot(self.figure, self.stream, self.chart_selector.currentText())
+        self.canvas.draw()
+        self.stream_plot.update()
+
+    def update_stream(self):
+        # Un cuadro: se filtra lo recibido desde el anterior y se redibuja sólo la línea
+        with stage('stream.filtrar'):
+            marcas = self.stream.drain()
+        if marcas:
+            with stage('stream.dibujo'):
+                self.stream_plot.update()
+            self.stream.frame_done(marcas)
+            self.loading_chart_label.setText(self.stream.stats.summary())
+
+    def stop_stream(self):
+        # Detiene la fuente y el refresco; el último cuadro queda en pantalla
+        if self.stream is None:
+            return
+        self.stream_timer.stop()
+        self.cancel_slots('stream')
+        self.update_stream()
+        self.hide_busy()
+        self.loading_chart_label.setText(self.stream.stats.summary())
+        self.loading_chart_label.show()
+
+    def close_stream(self):
+        self.stop_stream()
+        if self.stream_plot is not None:
+            self.stream_plot.remove()
+        self.stream = None
+        self.stream_plot = None
+
+    def stream_failed(self, message):
+        self.stop_stream()
+        QMessageBox.critical(self, 'Error', f"Error en la transmisión: {message}")
+
+    def closeEvent(self, event):
+        # Los trabajos se cancelan para que el pool de hilos no demore el cierre
+        self.close_stream()
+        self.cancel_slots()
+        super().closeEvent(event)
 
     def plot_chart(self):
-        if self.raw_data is not None:
+        from band_power import signal_band_features
+        from decimation import DecimatedLine
+        from spectral import channel_psd, channel_spectrogram
+
+        if self.stream is not None:
+            # En vivo sólo se elige el canal; el modo no aplica
+            self.draw_stream()
+            return
+        if self.signal is not None:
             self.selected_column = self.chart_selector.currentText().upper()
             if self.selected_column and self.selected_column != "Seleccione una columna":
+                if self.chart_type_group.checkedButton() is not None:
+                    TELEMETRY.begin(f"graficar {self.chart_type_group.checkedButton().text().strip()}")
+                # Cambiar de canal o de modo descarta el análisis pendiente
+                self.cancel_slots('analysis')
+                self.hide_busy()
+                if self.signal.pyramids is None and (self.muestra_button.isChecked() or self.tiempo_button.isChecked()
+                                                     or self.apilado_button.isChecked()
+                                                     or self.superponer_button.isChecked()):
+                    # Sin pirámide cada consulta recorrería y filtraría la grabación entera en este
+                    # hilo; pyramids_finished vuelve a graficar cuando está lista
+                    self.draw_pending_overview()
+                    return
+                if self.apilado_button.isChecked():
+                    self.plot_stacked()
+                    return
+                self.close_stacked()
                 self.figure.clear()
+                self.decimated_lines = []
                 ax = self.figure.add_subplot(111)
 
                 try:
@@ -275,9 +755,7 @@ class BrainBit(QMainWindow):
 
                         self.hide_item_range()
 
-                        # Crear un DataFrame de pandas
-                        df = pd.DataFrame(self.raw_data.get_data().T, columns=self.raw_data.ch_names)
-                        ax.plot(df.index, df[self.selected_column])
+                        self.decimated_lines.append(DecimatedLine(ax, self.signal.pyramid(self.selected_column)))
                         ax.set(xlabel='Muestra', ylabel='Amplitud', title=f'Datos del canal {self.selected_column}')
                         ax.legend()
 
@@ -288,29 +766,17 @@ class BrainBit(QMainWindow):
                         self.tiempo_max_label.show()
                         self.tiempo_max_text.show()
                         self.hide_frecuencia_range()
+                        self.hide_spectrogram_params()
 
-                        tiempo_max_abs = int(max(self.raw_data.times.T))
-                        if not self.range_changed:
-                            self.tiempo_min_text.setText("0")
-                            self.tiempo_max_text.setText(str(tiempo_max_abs)) # Atribui valor estandar 
-                        self.range_changed = False
-
-                        tiempo_min_value = int(self.tiempo_min_text.text())
-                        tiempo_max_value = int(self.tiempo_max_text.text())
-                        if tiempo_min_value > tiempo_max_abs or tiempo_max_value > tiempo_max_abs:
-                            raise ValueError(f"Valor maximo para el tiempo (ms) es de {tiempo_max_abs} ms.")
-                        
-                        if tiempo_min_value >= tiempo_max_value:
-                            raise ValueError("Tiempo minimo debe ser menor que tiempo maximo")
-                        
-                        df = pd.DataFrame(data=self.raw_data.get_data().T, index=self.raw_data.times.T, columns=self.raw_data.ch_names)
-                        df_subset = df[(df.index > int(self.tiempo_min_text.text())) & (df.index < int(self.tiempo_max_text.text()))]
-                        ax.plot(df_subset.index, df_subset[self.selected_column])
+                        start, stop = self.time_range()
+                        self.decimated_lines.append(DecimatedLine(ax, self.signal.pyramid(self.selected_column),
+                                                                  dx=1 / self.signal.sfreq, start=start, stop=stop))
                         ax.set(xlabel='Tiempo (ms)', ylabel='Amplitud', title=f'Datos del canal {self.selected_column}')
 
                     elif self.frequencia_button.isChecked():
 
                         self.hide_tiempo_range()
+                        self.hide_spectrogram_params()
                         self.frecuencia_min_label.show()
                         self.frecuencia_min_text.show()
                         self.frecuencia_max_label.show()
@@ -327,9 +793,13 @@ class BrainBit(QMainWindow):
                         if frequencia_min_value >= frequencia_max_value:
                             raise ValueError("Frecuencia minima debe ser menor que frecuencia maxima")
                     
-                        self.raw_data.plot_psd(ax=ax, fmin=frequencia_min_value, fmax=frequencia_max_value, n_fft=2048, picks=self.selected_column, show=False)
-                        ax.set(xlabel='Frecuencia (Hz)', ylabel='Amplitud', title=f'Amplitud vs Frecuencia for {self.selected_column}')
-                        ax.legend()
+                        if 2048 in self.signal.psds:
+                            # Espectro ya calculado para todos los canales: sólo se recorta
+                            self.analysis_finished(self.draw_psd, channel_psd(
+                                self.signal, self.selected_column, frequencia_min_value, frequencia_max_value, 2048))
+                            return
+                        self.run_analysis(channel_psd, self.signal, self.selected_column, frequencia_min_value,
+                                          frequencia_max_value, 2048, self.cache, on_done=self.draw_psd)
                     
                     elif self.amplitud_button.isChecked():
 
@@ -337,9 +807,13 @@ class BrainBit(QMainWindow):
                         self.tiempo_min_text.show()
                         self.tiempo_max_label.show()
                         self.tiempo_max_text.show()
+                        self.ventana_label.show()
+                        self.ventana_text.show()
+                        self.paso_label.show()
+                        self.paso_text.show()
                         self.hide_frecuencia_range()
 
-                        tiempo_max_abs = int(max(self.raw_data.times.T))
+                        tiempo_max_abs = int(self.signal.duration)
                         tiempo_max = min(50, tiempo_max_abs)
                         if not self.range_changed:
                             self.tiempo_min_text.setText("0")
@@ -348,61 +822,303 @@ class BrainBit(QMainWindow):
 
                         tiempo_min_value = int(self.tiempo_min_text.text())
                         tiempo_max_value = int(self.tiempo_max_text.text())
+                        ventana_value = int(self.ventana_text.text() or 0)
+                        paso_value = int(self.paso_text.text() or 0)
                         if tiempo_min_value > tiempo_max_abs or tiempo_max_value > tiempo_max_abs:
                             raise ValueError(f"Valor maximo para el tiempo (ms) es de {tiempo_max_abs} ms.")
                         if tiempo_min_value >= tiempo_max_value:
                             raise ValueError("Tiempo minimo debe ser menor que tiempo maximo.")
-                        if tiempo_max_value - tiempo_min_value > 80:
-                            raise ValueError("Rango maximo para este grafico es de 80 ms.")
+                        if ventana_value <= 0 or paso_value <= 0:
+                            raise ValueError("La ventana y el paso deben ser mayores que cero.")
 
-                        self.loading_chart_label.show()
-                        self.loading_chart_label.repaint()
+                        start, stop = self.signal.sample_range(tiempo_min_value, tiempo_max_value)
+                        self.run_analysis(channel_spectrogram, self.signal, self.selected_column, start, stop,
+                                          ventana_value / 1000, paso_value / 1000, on_done=self.draw_spectrogram)
 
-                        # Promediar los datos a lo largo del tiempo
-                        datos_promediados = np.mean(self.raw_data.get_data(), axis=0)
+                    elif self.superponer_button.isChecked():
 
-                        # Calcular la transformada de Fourier de los datos promediados
-                        fft_values = np.fft.fft(datos_promediados)
+                        self.hide_item_range()
+                        self.draw_overlay(ax)
+
+                    elif self.bandas_button.isChecked():
 
-                        # Obtener las frecuencias correspondientes
-                        frecuencias = np.fft.fftfreq(datos_promediados.shape[0], d=1/self.raw_data.info['sfreq'])
+                        self.hide_item_range()
 
-                        puntos_tiempo_min = int(tiempo_min_value * self.raw_data.info['sfreq'])
-                        puntos_tiempo_max = int(tiempo_max_value * self.raw_data.info['sfreq'])
+                        if BAND_EPOCH in self.signal.features:
+                            # Las características de todos los canales ya están calculadas
+                            self.analysis_finished(self.draw_band_powers, self.signal.features[BAND_EPOCH])
+                            return
+                        self.run_analysis(signal_band_features, self.signal, *BAND_EPOCH, on_done=self.draw_band_powers)
 
-                        # Limitar el rango de frecuencias y el número de puntos en el tiempo
-                        frecuencias_limitadas = frecuencias[puntos_tiempo_min:puntos_tiempo_max]
-                        tiempo_limitado = self.raw_data.times[puntos_tiempo_min:puntos_tiempo_max]
+                except ValueError as e:
+                    QMessageBox.critical(self, 'Error', f"Error al procesar las columnas: {str(e)}")
 
-                        # Expandir fft_values a una matriz bidimensional y repetir para cada frecuencia
-                        fft_values_expandido = np.abs(fft_values[puntos_tiempo_min:puntos_tiempo_max])
-                        fft_values_expandido = np.repeat(fft_values_expandido[:, np.newaxis], len(frecuencias_limitadas), axis=1)
+                with stage('dibujo'):
+                    self.canvas.draw()
 
-                        # Crear una malla para los datos
-                        X, Y = np.meshgrid(tiempo_limitado, frecuencias_limitadas)
+    def time_range(self):
+        # Rango de los campos de tiempo (todo el archivo si no se editaron), en muestras
+        tiempo_max_abs = int(self.signal.duration)
+        if not self.range_changed:
+            self.tiempo_min_text.setText("0")
+            self.tiempo_max_text.setText(str(tiempo_max_abs)) # Atribui valor estandar 
+        self.range_changed = False
 
-                        # Graficar los datos
-                        ax = self.figure.add_subplot(111, projection='3d')
-                        ax.plot_surface(X, Y, fft_values_expandido.T, cmap='jet')
+        tiempo_min_value = int(self.tiempo_min_text.text())
+        tiempo_max_value = int(self.tiempo_max_text.text())
+        if tiempo_min_value > tiempo_max_abs or tiempo_max_value > tiempo_max_abs:
+            raise ValueError(f"Valor maximo para el tiempo (ms) es de {tiempo_max_abs} ms.")
 
-                        # Etiquetas y título
-                        ax.set_xlabel('Tiempo (s)')
-                        ax.set_ylabel('Frecuencia (Hz)')
-                        ax.set_zlabel('Amplitud de Fourier')
-                        ax.set_title('Amplitud de Fourier en función del tiempo y la frecuencia')    
+        if tiempo_min_value >= tiempo_max_value:
+            raise ValueError("Tiempo minimo debe ser menor que tiempo maximo")
 
-                        self.loading_chart_label.hide()            
-                        
-                except ValueError as e:
-                    QMessageBox.critical(self, 'Error', f"Error al procesar las columnas: {str(e)}")
+        return self.signal.sample_range(tiempo_min_value, tiempo_max_value)
 
+    def plot_stacked(self):
+        from decimation import StackedLines
+
+        # Todos los canales en una sola colección: se crea una vez y luego sólo cambian sus datos
+        self.tiempo_min_label.show()
+        self.tiempo_min_text.show()
+        self.tiempo_max_label.show()
+        self.tiempo_max_text.show()
+        self.hide_frecuencia_range()
+        self.hide_spectrogram_params()
+
+        try:
+            start, stop = self.time_range()
+        except ValueError as e:
+            QMessageBox.critical(self, 'Error', f"Error al procesar las columnas: {str(e)}")
+            return
+
+        if self.stacked_view is None:
+            self.figure.clear()
+            self.decimated_lines = []
+            ax = self.figure.add_subplot(111)
+            ax.set(xlabel='Tiempo (s)', title='Todos los canales')
+            self.stacked_view = StackedLines(ax)
+        pyramids = [self.signal.pyramid(nombre) for nombre in self.signal.ch_names]
+        ejes_cambiaron = self.stacked_view.set_data(pyramids, self.signal.ch_names, dx=1 / self.signal.sfreq,
+                                                    start=start, stop=stop)
+        self.stacked_view.highlight(self.selected_column)
+        with stage('dibujo'):
+            if ejes_cambiaron:
                 self.canvas.draw()
+            else:
+                # Sólo cambió el canal resaltado
+                self.stacked_view.refresh()
+
+    def draw_overlay(self, ax):
+        from decimation import DecimatedLine
+
+        # El mismo canal de todos los archivos abiertos, sobre un eje de tiempo común
+        duracion = 0.0
+        extremos = []
+        pendientes = []
+        for recording in sorted(self.session, key=lambda r: r.name):
+            signal = recording.signal
+            if self.selected_column not in signal.ch_names:
+                continue
+            if signal.pyramids is None:
+                # Otro archivo diferido cuya pirámide no se armó: se omite en lugar de recorrerlo entero
+                pendientes.append(recording.name)
+                continue
+            pyramid = signal.pyramid(self.selected_column)
+            self.decimated_lines.append(DecimatedLine(ax, pyramid, dx=1 / signal.sfreq, lw=0.8, label=recording.name))
+            _, y = pyramid.query(0, pyramid.n_times, 1)
+            extremos += [y.min(), y.max()]
+            duracion = max(duracion, signal.duration)
+        if extremos:
+            margen = (max(extremos) - min(extremos)) * 0.05 or 1.0
+            ax.set_xlim(0, duracion)
+            ax.set_ylim(min(extremos) - margen, max(extremos) + margen)
+            ax.legend(loc='upper right', fontsize=8)
+        if pendientes:
+            ax.text(0.01, 0.01, f"Sin vista general todavía: {', '.join(pendientes)}", transform=ax.transAxes,
+                    fontsize=8, color='gray')
+        ax.set(xlabel='Tiempo (s)', ylabel='Amplitud', title=f'Canal {self.selected_column} en todos los archivos')
+
+    def draw_pending_overview(self):
+        self.close_stacked()
+        self.figure.clear()
+        self.decimated_lines = []
+        ax = self.figure.add_subplot(111)
+        ax.set_axis_off()
+        ax.text(0.5, 0.5, "Preparando la vista general del archivo...", transform=ax.transAxes,
+                ha='center', va='center', color='gray')
+        self.canvas.draw()
+
+    def close_stacked(self):
+        if self.stacked_view is not None:
+            self.stacked_view.remove()
+            self.stacked_view = None
+
+    def draw_psd(self, result):
+        frecuencias, psd = result
+        ax = self.figure.add_subplot(111)
+        ax.plot(frecuencias, psd)
+        ax.set(xlabel='Frecuencia (Hz)', ylabel='Amplitud', title=f'Amplitud vs Frecuencia for {self.selected_column}')
+
+    def draw_spectrogram(self, result):
+        tiempos, frecuencias, potencia = result
+        paso = tiempos[1] - tiempos[0] if len(tiempos) > 1 else 1.0
+        df = frecuencias[1] - frecuencias[0]
+
+        # Malla regular: imshow dibuja la imagen de una vez, sin un polígono por celda
+        ax = self.figure.add_subplot(111)
+        imagen = ax.imshow(potencia, aspect='auto', origin='lower', cmap='jet', interpolation='nearest',
+                           extent=(tiempos[0] - paso / 2, tiempos[-1] + paso / 2,
+                                   frecuencias[0] - df / 2, frecuencias[-1] + df / 2))
+        self.figure.colorbar(imagen, ax=ax, label='Potencia (dB)')
+
+        # Etiquetas y título
+        ax.set_xlabel('Tiempo (s)')
+        ax.set_ylabel('Frecuencia (Hz)')
+        ax.set_title(f'Espectrograma del canal {self.selected_column}')
+
+    def draw_band_powers(self, features):
+        from band_power import EEG_BANDS
+
+        filas = features[features['channel'] == self.selected_column]
+
+        ax = self.figure.add_subplot(111)
+        ax.stackplot(filas['start_s'], [filas[f'rel_{banda}'] for banda in EEG_BANDS], labels=list(EEG_BANDS))
+        ax.set_ylim(0, 1)
+        ax.legend(loc='upper right')
+        ax.set(xlabel='Tiempo (s)', ylabel='Potencia relativa', title=f'Potencia por bandas del canal {self.selected_column}')
+
+    def export_data(self):
+        from export import available_formats, export_recording
+
+        if self.signal is None:
+            QMessageBox.information(self, 'Exportar', "Cargue un archivo EDF antes de exportar.")
+            return
+        formato, ok = QInputDialog.getItem(self, 'Exportar', "Formato de exportación:", available_formats(), 0, False)
+        if not ok:
+            return
+        directorio = QFileDialog.getExistingDirectory(self, 'Seleccionar carpeta de destino')
+        if not directorio:
+            return
+
+        nombre = os.path.splitext(os.path.basename(self.file_path))[0]
+        TELEMETRY.begin(f"exportar {formato}")
+        self.show_busy("Exportando. Espere por favor!")
+        self.jobs.submit('export', export_recording, self.signal, directorio, nombre, formato,
+                         filter_params=self.filter_params, cache=self.cache, on_done=self.export_finished,
+                         on_error=self.export_failed, on_progress=self.update_progress)
+
+    def export_finished(self, salidas):
+        self.hide_busy()
+        QMessageBox.information(self, 'Exportar', "Archivos escritos:\n" + "\n".join(salidas))
+
+    def export_failed(self, message):
+        self.hide_busy()
+        QMessageBox.critical(self, 'Error', f"Error al exportar: {message}")
+
+    def toggle_telemetry_panel(self):
+        if self.telemetry_dock is None:
+            self.build_telemetry_panel()
+        visible = not self.telemetry_dock.isVisible()
+        self.telemetry_dock.setVisible(visible)
+        self.telemetry_check.setChecked(visible or TELEMETRY.enabled)
+
+    def build_telemetry_panel(self):
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+        self.telemetry_check = QCheckBox("Registrar tiempos por etapa")
+        self.telemetry_check.toggled.connect(self.set_telemetry_enabled)
+        self.profile_check = QCheckBox("cProfile por interacción")
+        if SINGLE_PROFILER:
+            self.profile_check.setToolTip("Perfila cada interacción (más lento). Con Python 3.12 o posterior hay "
+                                          "un solo perfilador, que incluye los trabajos en segundo plano")
+        else:
+            self.profile_check.setToolTip("Perfila cada interacción en todos sus hilos (más lento)")
+        self.profile_check.toggled.connect(lambda activo: setattr(TELEMETRY, 'profile', activo))
+        self.telemetry_list = QListWidget()
+        layout.addWidget(self.telemetry_check)
+        layout.addWidget(self.profile_check)
+        layout.addWidget(self.telemetry_list)
+        for texto, accion in (("Guardar JSON", self.save_telemetry_json),
+                              ("Guardar traza Chrome", self.save_telemetry_trace),
+                              ("Guardar cProfile", self.save_telemetry_profile),
+                              ("Limpiar", self.clear_telemetry)):
+            boton = QPushButton(texto)
+            boton.clicked.connect(accion)
+            layout.addWidget(boton)
+
+        self.telemetry_label = QLabel("")
+        self.statusBar().addPermanentWidget(self.telemetry_label)
+        self.telemetry_dock = QDockWidget("Perfil", self)
+        self.telemetry_dock.setWidget(panel)
+        self.telemetry_dock.hide()
+        self.addDockWidget(Qt.RightDockWidgetArea, self.telemetry_dock)
+
+    def set_telemetry_enabled(self, enabled):
+        TELEMETRY.set_enabled(enabled)
+        self.statusBar().setVisible(enabled)
+        if enabled:
+            self.telemetry_timer.start()
+        else:
+            self.telemetry_timer.stop()
+
+    def refresh_telemetry(self):
+        # Etapas de la última interacción: tiempo total, bytes copiados y pico de memoria
+        if TELEMETRY.recorded == self.telemetry_shown:
+            return
+        self.telemetry_shown = TELEMETRY.recorded
+        interaccion = TELEMETRY.last_interaction()
+        if interaccion is None:
+            return
+        resumen = TELEMETRY.summary(interaccion['id'])
+        self.telemetry_list.clear()
+        self.telemetry_list.addItem(interaccion['name'])
+        for nombre, s in resumen.items():
+            veces = f" x{s['count']}" if s['count'] > 1 else ""
+            self.telemetry_list.addItem(f"  {nombre}{veces}: {s['total_s'] * 1e3:.1f} ms, {format_bytes(s['bytes'])}")
+        pico = max((s['peak_rss'] for s in resumen.values()), default=0)
+        lentas = sorted(resumen.items(), key=lambda item: -item[1]['total_s'])[:3]
+        etapas = ", ".join(f"{nombre} {s['total_s'] * 1e3:.0f} ms" for nombre, s in lentas)
+        self.telemetry_label.setText(f"{interaccion['name']}: {etapas} | pico RSS {format_bytes(pico)}")
+
+    def save_telemetry_json(self):
+        ruta = QFileDialog.getSaveFileName(self, 'Guardar perfil', 'perfil.json', filter="JSON (*.json)")[0]
+        if ruta:
+            TELEMETRY.dump_json(ruta)
+
+    def save_telemetry_trace(self):
+        ruta = QFileDialog.getSaveFileName(self, 'Guardar traza', 'traza.json',
+                                           filter="Traza de Chrome (*.json)")[0]
+        if ruta:
+            TELEMETRY.dump_chrome_trace(ruta)
+
+    def save_telemetry_profile(self):
+        ruta = QFileDialog.getSaveFileName(self, 'Guardar cProfile', 'interaccion.prof',
+                                           filter="cProfile (*.prof)")[0]
+        if not ruta:
+            return
+        try:
+            TELEMETRY.dump_profile(ruta)
+        except ValueError as e:
+            QMessageBox.information(self, 'Perfil', str(e))
+
+    def clear_telemetry(self):
+        TELEMETRY.clear()
+        self.telemetry_shown = 0
+        self.telemetry_list.clear()
+        self.telemetry_label.setText("")
 
     def show_help(self):
         QMessageBox.information(self, 'Ayuda', "Bienvenido al Analizador de Ondas EEG - Transformada de Fourier.\n\n"
             "Pasos para usar la aplicación:\n"
             "1. Haga clic en 'Cargar Archivo CSV' para cargar un archivo CSV.\n"
             "2. Seleccione 'Amplitud vs Frecuencia' o 'Voltaje vs Tiempo' con los radio buttons.\n"
+            "   'Potencia por Bandas' muestra la potencia relativa delta, theta, alpha, beta y gamma.\n"
+            "   'Todos los Canales' apila los canales; el seleccionado se resalta.\n"
+            "   'Superponer Archivos' dibuja el canal elegido de todos los archivos abiertos.\n"
+            "   Los archivos cargados quedan en el panel de la izquierda; un clic vuelve a ellos al instante.\n"
+            "   'Exportar' guarda la señal filtrada, la PSD y la potencia por bandas (f32, Parquet o Arrow).\n"
+            "   'En vivo' reproduce un archivo EDF en tiempo real a la velocidad elegida.\n"
+            "   F12 abre el panel de perfil: tiempos, memoria y bytes copiados por etapa.\n"
             "3. Seleccione la columna deseada en el menú desplegable.\n"
             "4. Explore las ondas EEG en el gráfico.\n"
             "5. Formato requerido del archivo CSV:\n"
@@ -0,0 +1,80 @@
+import csv
+import os
+import time
+
+from band_power import EEG_BANDS, band_powers, signal_band_features
+from disk_cache import DiskCache
+from export import export_recording
+from signal_model import finish_lazy_signal, open_edf
+from spectral import compute_psd
+
+
+def analyze_file(path, output_dir, l_freq=0.1, h_freq=100.0, n_fft=2048, use_cache=True, export_format=None):
+    """Carga → filtro → PSD → potencia por bandas → exportación de un archivo EDF.
+
+    Es el mismo recorrido que hace la interfaz, sin Qt, para poder
+    ejecutarse en otro proceso. Escribe ``<nombre>_psd.csv``,
+    ``<nombre>_bandas.csv`` y ``<nombre>_caracteristicas.csv`` (potencia
+    por bandas y cocientes por época) en ``output_dir`` y devuelve un resumen.
+    Con ``export_format`` (ver ``export.EXPORT_FORMATS``) exporta además la
+    señal filtrada, la PSD y las características en formato columnar.
+    """
+    inicio = time.perf_counter()
+    cache = DiskCache() if use_cache else None
+    _, signal = open_edf(path, l_freq, h_freq, cache=cache, verbose='ERROR')
+    if signal.pyramids is None:
+        signal = finish_lazy_signal(signal, cache)
+
+    freqs, psd = compute_psd(signal, n_fft=n_fft, cache=cache)
+    potencias = band_powers(freqs, psd)
+    caracteristicas = signal_band_features(signal)
+
+    nombre = os.path.splitext(os.path.basename(path))[0]
+    salidas = [
+        write_psd_csv(os.path.join(output_dir, f'{nombre}_psd.csv'), signal.ch_names, freqs, psd),
+        write_band_csv(os.path.join(output_dir, f'{nombre}_bandas.csv'), signal.ch_names, potencias),
+        write_features_csv(os.path.join(output_dir, f'{nombre}_caracteristicas.csv'), caracteristicas),
+    ]
+    if export_format:
+        salidas += export_recording(signal, output_dir, nombre, export_format, n_fft=n_fft,
+                                    filter_params=(l_freq, h_freq), cache=cache)
+    return {
+        'archivo': path,
+        'canales': len(signal.ch_names),
+        'muestras': signal.n_times,
+        'sfreq': signal.sfreq,
+        'duracion_s': round(signal.duration, 3),
+        'tiempo_s': round(time.perf_counter() - inicio, 3),
+        'salidas': ';'.join(salidas),
+    }
+
+
+def write_psd_csv(path, ch_names, freqs, psd):
+    # Una fila por frecuencia, una columna por canal (µV²/Hz)
+    with open(path, 'w', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(['frecuencia_hz'] + list(ch_names))
+        for i, frecuencia in enumerate(freqs):
+            escritor.writerow([f'{frecuencia:.6g}'] + [f'{v:.6g}' for v in psd[:, i] * 1e12])
+    return path
+
+
+def write_band_csv(path, ch_names, potencias, bands=None):
+    # Una fila por canal, una columna por banda (µV²)
+    bands = bands or EEG_BANDS
+    with open(path, 'w', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(['canal'] + list(bands))
+        for canal, fila in zip(ch_names, potencias * 1e12):
+            escritor.writerow([canal] + [f'{v:.6g}' for v in fila])
+    return path
+
+
+def write_features_csv(path, features):
+    # Una fila por (canal, época) con las columnas del arreglo estructurado
+    with open(path, 'w', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(features.dtype.names)
+        for fila in features.tolist():
+            escritor.writerow([v if isinstance(v, str) else f'{v:.6g}' for v in fila])
+    return path
@@ -0,0 +1,134 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window
+
+from telemetry import add_bytes, stage
+
+# Bandas clásicas de EEG (Hz)
+EEG_BANDS = {
+    'delta': (0.5, 4.0),
+    'theta': (4.0, 8.0),
+    'alpha': (8.0, 13.0),
+    'beta': (13.0, 30.0),
+    'gamma': (30.0, 100.0),
+}
+
+# Cocientes habituales: nombre -> (bandas del numerador, bandas del denominador)
+BAND_RATIOS = {
+    'theta_beta': (('theta',), ('beta',)),
+    'alpha_theta': (('alpha',), ('theta',)),
+    'delta_alpha': (('delta',), ('alpha',)),
+    'engagement': (('beta',), ('alpha', 'theta')),
+}
+
+# Épocas que se transforman por lote (acota la memoria en grabaciones largas)
+EPOCH_BATCH = 1024
+
+
+def band_weights(freqs, bands):
+    """Matriz (n_frecuencias, n_bandas) que integra una PSD por bandas con un producto matricial.
+
+    Es la única regla de integración por bandas: cada frecuencia de
+    ``[lo, hi)`` aporta su valor por el ancho de un bin.
+    """
+    df = freqs[1] - freqs[0]
+    pesos = np.zeros((len(freqs), len(bands)))
+    for i, (lo, hi) in enumerate(bands.values()):
+        pesos[(freqs >= lo) & (freqs < hi), i] = df
+    return pesos
+
+
+def band_powers(freqs, psd, bands=None):
+    """Potencia absoluta por banda de una PSD (V²/Hz) con ``band_weights``; forma (n_canales, n_bandas)."""
+    return psd @ band_weights(freqs, bands or EEG_BANDS)
+
+
+def epoch_band_powers(signal, epoch_seconds=4.0, step_seconds=2.0, bands=None, progress=None):
+    """Potencia absoluta por canal, época y banda en una pasada vectorizada.
+
+    Cada época es una vista de la señal (``sliding_window_view``); por lote
+    se aplica una ventana de Hann, un único ``rfft`` y la integración por
+    bandas como producto matricial. Devuelve ``(inicios_s, potencias)`` con
+    ``potencias`` de forma (n_canales, n_épocas, n_bandas) en V².
+    """
+    bands = bands or EEG_BANDS
+    n_epoca = int(round(epoch_seconds * signal.sfreq))
+    paso = int(round(step_seconds * signal.sfreq))
+    if n_epoca < 2 or paso < 1:
+        raise ValueError("La época y el paso deben abarcar al menos una muestra.")
+    if signal.n_times < n_epoca:
+        raise ValueError("La grabación es más corta que una época.")
+
+    n_epocas = (signal.n_times - n_epoca) // paso + 1
+    ventana = get_window('hann', n_epoca)
+    freqs = np.fft.rfftfreq(n_epoca, d=1 / signal.sfreq)
+    # Escala de densidad de un solo lado, ya incluida en los pesos de integración
+    escala = np.full(len(freqs), 2.0 / (signal.sfreq * np.sum(ventana ** 2)))
+    escala[0] /= 2
+    if n_epoca % 2 == 0:
+        escala[-1] /= 2
+    pesos = band_weights(freqs, bands) * escala[:, np.newaxis]
+
+    potencias = np.empty((len(signal.ch_names), n_epocas, len(bands)))
+    for e0 in range(0, n_epocas, EPOCH_BATCH):
+        if progress:
+            progress(100 * e0 // n_epocas, "Calculando potencia por bandas")
+        e1 = min(e0 + EPOCH_BATCH, n_epocas)
+        x = np.asarray(signal.read(e0 * paso, (e1 - 1) * paso + n_epoca))
+        with stage('bandas'):
+            epocas = sliding_window_view(x, n_epoca, axis=-1)[:, ::paso]
+            espectro = np.fft.rfft(epocas * ventana, axis=-1)
+            potencias[:, e0:e1] = (espectro.real ** 2 + espectro.imag ** 2) @ pesos
+            # Épocas con ventana y su espectro
+            add_bytes(epocas.size * ventana.itemsize + espectro.nbytes)
+
+    return np.arange(n_epocas) * paso / signal.sfreq, potencias
+
+
+def band_features(signal, epoch_seconds=4.0, step_seconds=2.0, bands=None, ratios=None, progress=None):
+    """Potencia absoluta (µV²) y relativa por banda, y cocientes, para todos los canales y épocas.
+
+    Devuelve un arreglo estructurado con una fila por (canal, época) y los
+    campos ``channel``, ``start_s``, ``abs_<banda>``, ``rel_<banda>`` y uno
+    por cociente de ``ratios``.
+    """
+    bands = bands or EEG_BANDS
+    ratios = BAND_RATIOS if ratios is None else ratios
+    inicios, absoluta = epoch_band_powers(signal, epoch_seconds, step_seconds, bands, progress)
+    absoluta = absoluta * 1e12
+    total = absoluta.sum(axis=-1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relativa = absoluta / total
+
+    nombres = list(bands)
+    campos = [('channel', f'U{max(len(c) for c in signal.ch_names)}'), ('start_s', 'f8')]
+    campos += [(f'abs_{b}', 'f8') for b in nombres] + [(f'rel_{b}', 'f8') for b in nombres]
+    campos += [(r, 'f8') for r in ratios]
+
+    n_canales, n_epocas = absoluta.shape[:2]
+    resultado = np.empty(n_canales * n_epocas, dtype=campos)
+    resultado['channel'] = np.repeat(signal.ch_names, n_epocas)
+    resultado['start_s'] = np.tile(inicios, n_canales)
+    for i, b in enumerate(nombres):
+        resultado[f'abs_{b}'] = absoluta[..., i].ravel()
+        resultado[f'rel_{b}'] = relativa[..., i].ravel()
+    for nombre, (numerador, denominador) in ratios.items():
+        num = sum(absoluta[..., nombres.index(b)] for b in numerador)
+        den = sum(absoluta[..., nombres.index(b)] for b in denominador)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            resultado[nombre] = (num / den).ravel()
+    return resultado
+
+
+def signal_band_features(signal, epoch_seconds=4.0, step_seconds=2.0, progress=None):
+    """``band_features`` con las bandas por defecto, calculado una vez por señal."""
+    clave = (epoch_seconds, step_seconds)
+    if clave not in signal.features:
+        signal.features[clave] = band_features(signal, epoch_seconds, step_seconds, progress=progress)
+    return signal.features[clave]
+
+
+def to_dataframe(features):
+    import pandas as pd
+
+    return pd.DataFrame(features)
@@ -0,0 +1,105 @@
+"""Procesa en lote archivos EDF sin interfaz gráfica.
+
+Ejemplo:
+    python batch.py data/ -o resultados -j 4
+    python batch.py "registros/2024-*/*.edf" --h-freq 45
+    python batch.py data/ --exportar parquet
+"""
+import argparse
+import csv
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from analysis import analyze_file
+from disk_cache import DiskCache
+from export import EXPORT_FORMATS
+
+CAMPOS_RESUMEN = ['archivo', 'estado', 'canales', 'muestras', 'sfreq', 'duracion_s', 'tiempo_s', 'salidas', 'error']
+
+
+def expand_inputs(inputs):
+    """Directorios (sus ``*.edf``), archivos y patrones glob, sin repetir."""
+    archivos = []
+    for entrada in inputs:
+        if os.path.isdir(entrada):
+            archivos.extend(sorted(glob.glob(os.path.join(entrada, '*.edf'))))
+        elif any(c in entrada for c in '*?['):
+            archivos.extend(sorted(glob.glob(entrada, recursive=True)))
+        else:
+            archivos.append(entrada)
+    vistos = set()
+    return [a for a in archivos if a.lower().endswith('.edf') and not (a in vistos or vistos.add(a))]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Procesa en lote archivos EDF: filtro, PSD, potencia por bandas y exportación.")
+    parser.add_argument('inputs', nargs='+', help="directorios, archivos .edf o patrones glob")
+    parser.add_argument('-o', '--output', default='resultados', help="directorio de salida (por defecto: resultados)")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count(), help="procesos en paralelo")
+    parser.add_argument('--l-freq', type=float, default=0.1, help="frecuencia de corte inferior (Hz)")
+    parser.add_argument('--h-freq', type=float, default=100.0, help="frecuencia de corte superior (Hz)")
+    parser.add_argument('--n-fft', type=int, default=2048, help="largo de la FFT de Welch")
+    parser.add_argument('--no-cache', action='store_true', help="no usar la caché en disco")
+    parser.add_argument('--exportar', choices=EXPORT_FORMATS, help="exporta además señal, PSD y características "
+                                                                  "(f32: memmap con encabezado JSON; parquet/arrow: requieren pyarrow)")
+    return parser.parse_args(argv)
+
+
+def precompute_hashes(archivos):
+    # Las huellas se calculan aquí, en un solo proceso, para que los procesos del pool sólo lean
+    # el índice de la caché en lugar de reescribirlo todos a la vez
+    try:
+        cache = DiskCache()
+    except OSError:
+        return
+    for archivo in archivos:
+        try:
+            cache.content_hash(archivo)
+        except OSError:
+            pass  # el error del archivo se informa al procesarlo
+
+
+def run(args, out=sys.stdout):
+    archivos = expand_inputs(args.inputs)
+    if not archivos:
+        print("No se encontraron archivos EDF.", file=out)
+        return 1
+    os.makedirs(args.output, exist_ok=True)
+    if not args.no_cache:
+        precompute_hashes(archivos)
+
+    fallidos = 0
+    resumen_path = os.path.join(args.output, 'resumen.csv')
+    with open(resumen_path, 'w', newline='') as resumen, \
+            ProcessPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        escritor = csv.DictWriter(resumen, fieldnames=CAMPOS_RESUMEN)
+        escritor.writeheader()
+        futuros = {
+            pool.submit(analyze_file, archivo, args.output, args.l_freq, args.h_freq, args.n_fft, not args.no_cache,
+                        args.exportar): archivo
+            for archivo in archivos
+        }
+        # Cada resultado se escribe apenas termina su archivo
+        for i, futuro in enumerate(as_completed(futuros), 1):
+            archivo = futuros[futuro]
+            try:
+                fila = dict(futuro.result(), estado='ok')
+            except Exception as e:
+                fallidos += 1
+                fila = {'archivo': archivo, 'estado': 'error', 'error': str(e)}
+            escritor.writerow(fila)
+            resumen.flush()
+            print(f"[{i}/{len(archivos)}] {fila['estado']:<5} {archivo}", file=out)
+
+    print(f"Resumen en {resumen_path}", file=out)
+    return 1 if fallidos else 0
+
+
+def main(argv=None):
+    return run(parse_args(argv))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Potencia por bandas: pasada vectorizada frente a un bucle por canal y época.
+
+Uso: python benchmarks/bench_band_power.py [--repeat N] [--seconds S]
+"""
+import argparse
+import os
+
+import numpy as np
+from scipy.signal import get_window
+
+from common import concatenated_signal, edf_files, load_filtered, timeit
+from band_power import EEG_BANDS, epoch_band_powers
+from signal_model import SignalModel
+
+
+def naive_band_powers(signal, epoch_seconds=4.0, step_seconds=2.0):
+    # Implementación directa: un periodograma y una suma por banda en cada (canal, época)
+    n_epoca = int(round(epoch_seconds * signal.sfreq))
+    paso = int(round(step_seconds * signal.sfreq))
+    ventana = get_window('hann', n_epoca)
+    freqs = np.fft.rfftfreq(n_epoca, d=1 / signal.sfreq)
+    df = freqs[1] - freqs[0]
+    n_epocas = (signal.n_times - n_epoca) // paso + 1
+    potencias = np.empty((len(signal.ch_names), n_epocas, len(EEG_BANDS)))
+    for c, nombre in enumerate(signal.ch_names):
+        canal = signal.channel(nombre)
+        for e in range(n_epocas):
+            espectro = np.abs(np.fft.rfft(canal[e * paso:e * paso + n_epoca] * ventana)) ** 2
+            psd = espectro / (signal.sfreq * np.sum(ventana ** 2))
+            psd[1:(n_epoca + 1) // 2] *= 2
+            for b, (lo, hi) in enumerate(EEG_BANDS.values()):
+                potencias[c, e, b] = psd[(freqs >= lo) & (freqs < hi)].sum() * df
+    return potencias
+
+
+def run(signal, nombre, repeat):
+    _, vectorizado = epoch_band_powers(signal)
+    np.testing.assert_allclose(vectorizado, naive_band_powers(signal), rtol=1e-9)
+    t_bucle = timeit(lambda: naive_band_powers(signal), max(1, repeat // 5))
+    t_vector = timeit(lambda: epoch_band_powers(signal), repeat)
+    print(f"{nombre:<28}{signal.n_times:>11}{np.median(t_bucle) * 1e3:>12.1f}"
+          f"{np.median(t_vector) * 1e3:>14.1f}{np.median(t_bucle) / np.median(t_vector):>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seconds', type=float, default=3600, help="duración de la grabación sintética")
+    args = parser.parse_args()
+
+    print(f"{'archivo':<28}{'muestras':>11}{'bucle ms':>12}{'vectorial ms':>14}{'mejora':>10}")
+    for path in edf_files():
+        run(SignalModel.from_raw(load_filtered(path)), os.path.basename(path), args.repeat)
+    run(concatenated_signal(edf_files(), args.seconds), f"sintético {args.seconds:.0f} s", args.repeat)
+
+
+if __name__ == '__main__':
+    main()
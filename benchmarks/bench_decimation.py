@@ -0,0 +1,76 @@
+"""Latencia de redibujado: línea a resolución completa frente a la pirámide min/max.
+
+Uso: python benchmarks/bench_decimation.py [--repeat N] [--seconds S]
+"""
+import argparse
+import os
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from common import concatenated_signal, edf_files, load_filtered, timeit
+from decimation import DecimatedLine
+from signal_model import SignalModel
+
+
+def check_zoom(ax, linea):
+    # Al acercarse a 100 muestras la línea debe volver a consultar la pirámide y mostrarlas todas
+    xlim = ax.get_xlim()
+    antes = len(linea.line.get_xdata())
+    ax.set_xlim(1000, 1100)
+    visibles = np.count_nonzero((linea.line.get_xdata() >= 1000) & (linea.line.get_xdata() <= 1100))
+    assert visibles >= 100, f"el zoom no actualizó la línea decimada ({visibles} puntos visibles de {antes})"
+    ax.set_xlim(*xlim)
+
+
+def _redraw_latency(signal, decimated, repeat):
+    figure = Figure(figsize=(10, 4), dpi=100)
+    canvas = FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    canal = signal.ch_names[0]
+    if decimated:
+        # Se conserva la referencia: el callback de zoom sólo vive mientras viva la línea
+        linea = DecimatedLine(ax, signal.pyramid(canal))
+        check_zoom(ax, linea)
+    else:
+        ax.plot(signal.channel(canal))
+    canvas.draw()
+
+    # Simula un desplazamiento con la barra de navegación: mover el eje X y redibujar
+    n = signal.n_times
+    ventanas = [(i * n // (2 * repeat), n // 2 + i * n // (2 * repeat)) for i in range(repeat)]
+    pasos = iter(ventanas * 2)
+
+    def redraw():
+        ax.set_xlim(*next(pasos))
+        canvas.draw()
+
+    return timeit(redraw, repeat)
+
+
+def run(signal, nombre, repeat):
+    inicio = timeit(signal.build_pyramids, 1)[0]
+    completo = _redraw_latency(signal, False, repeat)
+    piramide = _redraw_latency(signal, True, repeat)
+    print(f"{nombre:<28}{signal.n_times:>11}{inicio * 1e3:>12.1f}"
+          f"{completo.mean() * 1e3:>14.1f}{piramide.mean() * 1e3:>14.1f}{completo.mean() / piramide.mean():>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seconds', type=float, default=3600, help="duración de la grabación sintética")
+    args = parser.parse_args()
+
+    print(f"{'archivo':<28}{'muestras':>11}{'pirámide ms':>12}{'completo ms':>14}{'min/max ms':>14}{'mejora':>10}")
+    for path in edf_files():
+        run(SignalModel.from_raw(load_filtered(path)), os.path.basename(path), args.repeat)
+    run(concatenated_signal(edf_files(), args.seconds), f"sintético {args.seconds:.0f} s", args.repeat)
+
+
+if __name__ == '__main__':
+    main()
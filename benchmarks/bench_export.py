@@ -0,0 +1,89 @@
+"""Exportación columnar por tramos frente a armar el DataFrame completo como en los notebooks.
+
+Mide tiempo, rendimiento (MB/s de señal float32 escrita) y memoria pico
+(``tracemalloc``) de exportar una grabación sintética larga, y verifica que
+lo exportado se relee sin copiar (memmap / Arrow) con los mismos valores.
+Con ``--repeat N`` cada método se corre N veces y se reporta la mediana del
+tiempo y el mayor de los picos.
+
+Uso: python benchmarks/bench_export.py [--seconds S] [--repeat N]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from common import concatenated_signal, edf_files
+from export import EXPORT_PARTS, arrow_available, available_formats, export_recording, open_f32_export
+
+
+def dataframe_export(signal, path):
+    # Lo que hacen hoy los notebooks: la tabla completa en memoria y después a disco
+    import pandas as pd
+
+    tabla = pd.DataFrame(signal.data.T, columns=signal.ch_names)
+    if arrow_available():
+        tabla.to_parquet(path + '.parquet')
+    else:
+        tabla.to_pickle(path + '.pkl')
+
+
+def measure(fn, repeat):
+    tiempos = []
+    picos = []
+    for _ in range(repeat):
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - inicio)
+        picos.append(tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return float(np.median(tiempos)), max(picos)
+
+
+def check(signal, directorio, fmt):
+    if fmt == 'f32':
+        _, arrays = open_f32_export(os.path.join(directorio, 'sintetico'))
+        np.testing.assert_array_equal(arrays['senal'], signal.data.astype(np.float32))
+        return
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    ruta = os.path.join(directorio, 'sintetico_senal.' + ('parquet' if fmt == 'parquet' else 'arrow'))
+    if fmt == 'parquet':
+        tabla = pq.read_table(ruta, memory_map=True)
+    else:
+        with pa.memory_map(ruta) as fuente:
+            tabla = pa.ipc.open_file(fuente).read_all()
+    np.testing.assert_array_equal(tabla.column(signal.ch_names[0]).to_numpy(), signal.data[0].astype(np.float32))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--seconds', type=float, default=3600, help="duración de la grabación sintética")
+    parser.add_argument('--repeat', type=int, default=1, help="corridas por método")
+    args = parser.parse_args()
+
+    signal = concatenated_signal(edf_files(), args.seconds)
+    # La PSD y las características se calculan antes para medir sólo la escritura
+    with tempfile.TemporaryDirectory() as directorio:
+        export_recording(signal, directorio, 'previo', 'f32')
+    mb = signal.data.size * 4 / 1024 ** 2
+
+    print(f"{len(signal.ch_names)} canales x {signal.n_times} muestras ({mb:.0f} MB en float32)")
+    print(f"{'método':<26}{'s':>8}{'MB/s':>9}{'pico MB':>10}")
+    with tempfile.TemporaryDirectory() as directorio:
+        tiempo, pico = measure(lambda: dataframe_export(signal, os.path.join(directorio, 'tabla')), args.repeat)
+        print(f"{'DataFrame completo':<26}{tiempo:>8.2f}{mb / tiempo:>9.0f}{pico / 1024 ** 2:>10.1f}")
+        for fmt in available_formats():
+            tiempo, pico = measure(lambda: export_recording(signal, directorio, 'sintetico', fmt, EXPORT_PARTS),
+                                   args.repeat)
+            check(signal, directorio, fmt)
+            print(f"{'por tramos (' + fmt + ')':<26}{tiempo:>8.2f}{mb / tiempo:>9.0f}{pico / 1024 ** 2:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
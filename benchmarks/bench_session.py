@@ -0,0 +1,51 @@
+"""Cambiar de grabación: recargar el EDF frente a volver a una ya abierta en la sesión.
+
+Abre todos los EDF de ``data/`` en una ``Session`` con el presupuesto dado
+(los que no entran pasan a la caché en disco o a modo diferido) y mide,
+para cada archivo, cargarlo de nuevo con ``open_edf`` frente a recuperarlo
+de la sesión y consultar la vista general de un canal.
+
+Uso: python benchmarks/bench_session.py [--budget-mb M] [--no-cache]
+"""
+import argparse
+import os
+import tempfile
+
+import numpy as np
+
+from common import edf_files, timeit
+from disk_cache import DiskCache
+from session import Session
+from signal_model import open_edf
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--budget-mb', type=float, default=4.0, help="memoria de la sesión (MB)")
+    parser.add_argument('--no-cache', action='store_true', help="desalojar a modo diferido en lugar de a disco")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as raiz:
+        cache = None if args.no_cache else DiskCache(raiz)
+        session = Session(cache, max_bytes=int(args.budget_mb * 1024 ** 2))
+        for path in edf_files():
+            raw, signal = open_edf(path, cache=cache, verbose='ERROR')
+            session.add(path, raw, signal, (0.1, 100.0))
+
+        print(f"memoria de la sesión: {session.memory_bytes() / 1024 ** 2:.1f} de {args.budget_mb:.1f} MB")
+        print(f"{'archivo':<24}{'estado':>10}{'recargar ms':>13}{'sesión ms':>11}")
+        for path in edf_files():
+            def volver():
+                signal = session.get(path).signal
+                pyramid = signal.pyramid(signal.ch_names[0])
+                pyramid.query(0, pyramid.n_times, 1000)
+
+            t_sesion = timeit(volver, args.repeat)
+            t_recarga = timeit(lambda: open_edf(path, verbose='ERROR'), args.repeat)
+            print(f"{os.path.basename(path):<24}{session.get(path).state:>10}"
+                  f"{np.median(t_recarga) * 1e3:>13.1f}{np.median(t_sesion) * 1e3:>11.2f}")
+
+
+if __name__ == '__main__':
+    main()
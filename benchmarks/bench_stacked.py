@@ -0,0 +1,89 @@
+"""Vista de todos los canales: reconstruir la figura frente a actualizar una LineCollection.
+
+Para cada cambio de vista (canal resaltado, rango) compara el camino
+anterior (``figure.clear()`` + una ``DecimatedLine`` por canal + dibujo
+completo) con ``StackedLines`` (actualizar datos + dibujo completo, o sólo
+blitting si los ejes no cambian).
+
+Uso: python benchmarks/bench_stacked.py [--repeat N] [--seconds S] [--channels C]
+"""
+import argparse
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from common import concatenated_signal, edf_files, timeit
+from decimation import DecimatedLine, StackedLines, build_pyramids
+
+
+def rebuild(figure, pyramids, names, dx, start, stop):
+    # Camino anterior: figura nueva y un artista por canal en cada cambio
+    figure.clear()
+    ax = figure.add_subplot(111)
+    separacion = 1e-4
+    for i, pyramid in enumerate(pyramids):
+        linea = DecimatedLine(ax, pyramid, x0=0.0, dx=dx, start=start, stop=stop, lw=0.6)
+        linea.line.set_ydata(linea.line.get_ydata() - i * separacion)
+    ax.set_yticks(-np.arange(len(names)) * separacion, names)
+    ax.set_ylim(-len(names) * separacion, separacion)
+    figure.canvas.draw()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--seconds', type=float, default=3600, help="duración de la grabación sintética")
+    parser.add_argument('--channels', type=int, default=32, help="canales (se repiten los del EDF)")
+    args = parser.parse_args()
+
+    signal = concatenated_signal(edf_files(), args.seconds)
+    repeticiones = -(-args.channels // len(signal.ch_names))
+    data = np.tile(signal.data, (repeticiones, 1))[:args.channels]
+    names = [f'{n} #{i // len(signal.ch_names)}' for i, n in enumerate(signal.ch_names * repeticiones)][:args.channels]
+    pyramids = build_pyramids(data)
+    dx = 1 / signal.sfreq
+    rangos = [(0, data.shape[1]), (0, data.shape[1] // 2), (data.shape[1] // 4, data.shape[1] // 3)]
+
+    figure = Figure(figsize=(12, 8))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+    vista = StackedLines(ax)
+    vista.set_data(pyramids, names, dx=dx)
+    figure.canvas.draw()
+
+    estado = {'i': 0}
+
+    def siguiente_rango():
+        estado['i'] += 1
+        return rangos[estado['i'] % len(rangos)]
+
+    def cambio_rango():
+        start, stop = siguiente_rango()
+        vista.set_data(pyramids, names, dx=dx, start=start, stop=stop)
+        figure.canvas.draw()
+
+    def cambio_canal():
+        estado['i'] += 1
+        vista.highlight(names[estado['i'] % len(names)])
+        vista.refresh()
+
+    t_canal = timeit(cambio_canal, args.repeat)
+    t_rango = timeit(cambio_rango, args.repeat)
+    vista.remove()
+    t_rebuild = timeit(lambda: rebuild(figure, pyramids, names, dx, *siguiente_rango()), args.repeat)
+
+    print(f"{args.channels} canales x {data.shape[1]} muestras")
+    print(f"{'cambio':<34}{'mediana ms':>12}{'p95 ms':>10}")
+    for nombre, tiempos in [("reconstruir figura (anterior)", t_rebuild),
+                            ("rango: set_data + dibujo", t_rango),
+                            ("canal: highlight + blitting", t_canal)]:
+        print(f"{nombre:<34}{np.median(tiempos) * 1e3:>12.2f}{np.percentile(tiempos, 95) * 1e3:>10.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+"""Arranque en frío: tiempo de importación y tiempo hasta ver la ventana.
+
+Lanza procesos nuevos (``QT_QPA_PLATFORM=offscreen`` si no hay pantalla)
+y mide:
+
+* la importación de ``Brainbit`` con ``python -X importtime``, con los
+  módulos que más tardan;
+* el tiempo desde que arranca el proceso hasta que la ventana se pinta por
+  primera vez, hasta que el área de gráficos está lista y hasta que termina
+  la precarga en segundo plano.
+
+Compara las medianas con el presupuesto de ``startup_budget.json`` y
+termina con error si alguna lo supera (``--update`` lo reescribe con los
+valores medidos más un margen).
+
+Uso: python benchmarks/bench_startup.py [--repeat N] [--top K] [--update]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from common import RAIZ
+
+BUDGET_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'startup_budget.json')
+
+# Proceso hijo: recibe el instante de lanzamiento y anota cada etapa relativa a él
+CHILD = r'''
+import json, sys, time
+inicio = float(sys.argv[1])
+marcas = {}
+from PyQt5.QtCore import QEvent, QObject, QTimer
+from PyQt5.QtWidgets import QApplication
+import Brainbit
+marcas['importacion_s'] = time.time() - inicio
+
+
+class Pintado(QObject):
+    def eventFilter(self, obj, event):
+        if obj is ventana and event.type() == QEvent.Paint and 'ventana_s' not in marcas:
+            marcas['ventana_s'] = time.time() - inicio
+        return False
+
+
+def esperar():
+    if ventana.figure is not None and 'graficos_s' not in marcas:
+        marcas['graficos_s'] = time.time() - inicio
+    if ventana.warm_up and not ventana.warm_up.is_alive() and 'precarga_s' not in marcas:
+        marcas['precarga_s'] = time.time() - inicio
+    if len(marcas) == 4:
+        app.quit()
+
+
+app = QApplication(sys.argv)
+ventana = Brainbit.BrainBit()
+filtro = Pintado()
+ventana.installEventFilter(filtro)
+ventana.show()
+temporizador = QTimer()
+temporizador.timeout.connect(esperar)
+temporizador.start(5)
+QTimer.singleShot(60000, app.quit)
+app.exec_()
+print(json.dumps(marcas))
+'''
+
+
+def child_env():
+    env = dict(os.environ)
+    if not env.get('DISPLAY') and not env.get('WAYLAND_DISPLAY'):
+        env.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    return env
+
+
+def import_times(top):
+    # -X importtime escribe en stderr: "import time: propio | acumulado | módulo" (en µs)
+    salida = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import Brainbit'], cwd=RAIZ,
+                            env=child_env(), capture_output=True, text=True, check=True).stderr
+    tiempos = []
+    for linea in salida.splitlines():
+        if not linea.startswith('import time:') or 'cumulative' in linea:
+            continue
+        _, acumulado, modulo = linea[len('import time:'):].split('|')
+        tiempos.append((int(acumulado) / 1e6, modulo.rstrip()))
+    total = next(t for t, m in reversed(tiempos) if m.strip() == 'Brainbit')
+    # Nivel 1 (dos espacios más que Brainbit): lo que Brainbit importa directamente
+    directos = [(t, m.strip()) for t, m in tiempos if len(m) - len(m.lstrip()) == 3]
+    return total, sorted(directos, reverse=True)[:top]
+
+
+def first_window():
+    inicio = time.time()
+    salida = subprocess.run([sys.executable, '-c', CHILD, repr(inicio)], cwd=RAIZ, env=child_env(),
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(salida.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=8, help="módulos más lentos a mostrar")
+    parser.add_argument('--update', action='store_true', help="reescribir el presupuesto con lo medido")
+    parser.add_argument('--margin', type=float, default=1.5, help="margen sobre lo medido al usar --update")
+    args = parser.parse_args()
+
+    total, principales = import_times(args.top)
+    print(f"importación de Brainbit (-X importtime): {total * 1e3:.0f} ms; lo que más tarda:")
+    for tiempo, modulo in principales:
+        print(f"  {modulo:<40}{tiempo * 1e3:>8.0f} ms")
+
+    corridas = [first_window() for _ in range(args.repeat)]
+    medido = {etapa: float(np.median([c[etapa] for c in corridas])) for etapa in corridas[0]}
+    etiquetas = {'importacion_s': "proceso + importación", 'ventana_s': "ventana pintada",
+                 'graficos_s': "área de gráficos lista", 'precarga_s': "precarga terminada"}
+
+    presupuesto = {}
+    if os.path.exists(BUDGET_FILE):
+        with open(BUDGET_FILE) as f:
+            presupuesto = json.load(f)
+
+    print(f"\n{'etapa (mediana de ' + str(args.repeat) + ')':<30}{'s':>8}{'límite':>9}")
+    excedidas = []
+    for etapa, valor in medido.items():
+        limite = presupuesto.get(etapa)
+        print(f"{etiquetas[etapa]:<30}{valor:>8.3f}{limite if limite is not None else '-':>9}")
+        if limite is not None and valor > limite:
+            excedidas.append(etiquetas[etapa])
+
+    if args.update:
+        with open(BUDGET_FILE, 'w') as f:
+            json.dump({etapa: round(valor * args.margin, 2) for etapa, valor in medido.items()}, f, indent=1)
+            f.write('\n')
+        print(f"\npresupuesto actualizado en {BUDGET_FILE}")
+    elif excedidas:
+        print(f"\nsupera el presupuesto: {', '.join(excedidas)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
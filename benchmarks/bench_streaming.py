@@ -0,0 +1,101 @@
+"""Transmisión en vivo sin interfaz: latencia, descartes y costo por cuadro.
+
+Reproduce cada EDF de ``data/`` con ``EdfReplaySource`` a velocidad
+acelerada, filtra con ``StreamFilter`` y dibuja con ``StreamPlot`` sobre
+Agg a cuadros por segundo fijos. Comprueba además que filtrar por bloques
+da lo mismo que filtrar la señal completa de una vez.
+
+Uso: python benchmarks/bench_streaming.py [--speed X] [--fps N] [--seconds S]
+"""
+import argparse
+import os
+import threading
+import time
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from scipy.signal import sosfilt, sosfilt_zi
+
+from common import edf_files
+from streaming import EdfReplaySource, LiveStream, StreamFilter, StreamPlot
+
+
+def check_filter(source):
+    # Filtrado por bloques frente a una sola pasada con el mismo estado inicial
+    data = source.raw.get_data()
+    por_bloques = StreamFilter(source.sfreq, data.shape[0])
+    salida = np.concatenate([por_bloques.process(data[:, i:i + source.block])
+                             for i in range(0, data.shape[1], source.block)], axis=1)
+    zi = sosfilt_zi(por_bloques.sos)[:, np.newaxis, :] * data[np.newaxis, :, :1]
+    completo, _ = sosfilt(por_bloques.sos, data, axis=-1, zi=zi)
+    np.testing.assert_allclose(salida, completo, rtol=1e-9, atol=1e-15)
+
+
+def run(path, speed, fps, seconds):
+    source = EdfReplaySource(path, speed=speed)
+    check_filter(source)
+    stream = LiveStream(source.sfreq, source.ch_names)
+    figure = Figure()
+    FigureCanvasAgg(figure)
+    plot = StreamPlot(figure, stream, source.ch_names[0])
+    figure.canvas.draw()
+
+    # La fuente corre en su hilo como en la interfaz; se detiene al pasar ``seconds``
+    limite = time.perf_counter() + seconds
+
+    def progress(percent, message=""):
+        if time.perf_counter() > limite:
+            raise StopIteration
+
+    def fuente():
+        try:
+            source.run(stream.push, progress)
+        except StopIteration:
+            pass
+
+    hilo = threading.Thread(target=fuente)
+    hilo.start()
+    cuadros = []
+    periodo = 1 / fps
+    while hilo.is_alive() or not stream.pending.empty():
+        inicio = time.perf_counter()
+        marcas = stream.drain()
+        if marcas:
+            plot.update()
+            stream.frame_done(marcas)
+            cuadros.append(time.perf_counter() - inicio)
+        time.sleep(max(0.0, periodo - (time.perf_counter() - inicio)))
+    hilo.join()
+
+    # Redibujo completo, para comparar con el costo de un cuadro con blitting
+    completo = []
+    for _ in range(20):
+        inicio = time.perf_counter()
+        figure.canvas.draw()
+        completo.append(time.perf_counter() - inicio)
+
+    p50, p95, p99 = stream.stats.latency_percentiles((50, 95, 99))
+    print(f"{os.path.basename(path):<24}{stream.stats.samples:>9}{p50 * 1e3:>9.1f}{p95 * 1e3:>9.1f}{p99 * 1e3:>9.1f}"
+          f"{stream.stats.drop_rate:>10.2%}{np.median(cuadros) * 1e3:>11.2f}{np.median(completo) * 1e3:>12.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--speed', type=float, default=10.0, help="velocidad de reproducción (0: sin pausa)")
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--seconds', type=float, default=5.0, help="segundos de reloj por archivo")
+    args = parser.parse_args()
+
+    print(f"{'archivo':<24}{'muestras':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'descartes':>10}"
+          f"{'cuadro ms':>11}{'completo ms':>12}")
+    for path in edf_files():
+        run(path, args.speed or None, args.fps, args.seconds)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+DATA_DIR = os.path.join(RAIZ, 'data')
+
+
+def edf_files():
+    return sorted(glob.glob(os.path.join(DATA_DIR, '*.edf')))
+
+
+def load_filtered(path, l_freq=0.1, h_freq=100.0):
+    import mne
+
+    raw = mne.io.read_raw_edf(path, preload=True, verbose='ERROR')
+    raw.filter(l_freq=l_freq, h_freq=h_freq, verbose='ERROR')
+    return raw
+
+
+def concatenated_signal(paths, seconds):
+    """Concatena las grabaciones (repitiéndolas si hace falta) hasta ``seconds``."""
+    from signal_model import SignalModel
+
+    bloques = []
+    total = 0
+    sfreq = None
+    ch_names = None
+    while True:
+        for path in paths:
+            raw = load_filtered(path)
+            if sfreq is None:
+                sfreq, ch_names = raw.info['sfreq'], raw.ch_names
+            bloques.append(raw.get_data())
+            total += bloques[-1].shape[1]
+            if total >= seconds * sfreq:
+                data = np.concatenate(bloques, axis=1)[:, :int(seconds * sfreq)]
+                return SignalModel(data, np.arange(data.shape[1]) / sfreq, sfreq, ch_names)
+
+
+def timeit(fn, repeat=20):
+    """Ejecuta ``fn`` ``repeat`` veces y devuelve los tiempos en segundos."""
+    tiempos = []
+    for _ in range(repeat):
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - inicio)
+    return np.array(tiempos)
+
+
+def write_synthetic_edf(path, seconds, n_channels=32, sfreq=256, seed=0):
+    """Escribe un EDF de ``seconds`` segundos con ``n_channels`` canales de EEG sintético.
+
+    Cada canal mezcla ritmos alfa y theta con ruido (semilla fija, así el
+    archivo es siempre el mismo), cuantizado a 16 bits en ±500 µV. Se
+    escribe por bloques de un minuto, de modo que la memoria no crece con
+    la duración. Devuelve ``path``.
+    """
+    seconds = int(seconds)
+    sfreq = int(sfreq)
+    rng = np.random.default_rng(seed)
+    fisico = 500.0  # µV
+    digital = 32767
+
+    def campo(valor, ancho):
+        return str(valor)[:ancho].ljust(ancho).encode('ascii')
+
+    n_bytes = 256 * (n_channels + 1)
+    cabecera = b''.join([
+        campo(0, 8), campo('X X X X', 80), campo('Startdate 01-JAN-2024 X brainbit sintetico', 80),
+        campo('01.01.24', 8), campo('00.00.00', 8), campo(n_bytes, 8), campo('', 44),
+        campo(seconds, 8), campo(1, 8), campo(n_channels, 4),
+    ])
+    etiquetas = [f'EEG S{i + 1:02d}' for i in range(n_channels)]
+    for ancho, valores in ((16, etiquetas), (80, ['AgAgCl electrode'] * n_channels), (8, ['uV'] * n_channels),
+                           (8, [-fisico] * n_channels), (8, [fisico] * n_channels),
+                           (8, [-digital] * n_channels), (8, [digital] * n_channels),
+                           (80, [''] * n_channels), (8, [sfreq] * n_channels), (32, [''] * n_channels)):
+        cabecera += b''.join(campo(v, ancho) for v in valores)
+
+    fases = rng.uniform(0, 2 * np.pi, size=(n_channels, 2, 1))
+    amplitudes = rng.uniform(10, 40, size=(n_channels, 2, 1))
+    with open(path, 'wb') as f:
+        f.write(cabecera)
+        for inicio in range(0, seconds, 60):
+            n = min(60, seconds - inicio)
+            t = (inicio + np.arange(n * sfreq) / sfreq)[np.newaxis]
+            x = (amplitudes[:, 0] * np.sin(2 * np.pi * 10 * t + fases[:, 0])
+                 + amplitudes[:, 1] * np.sin(2 * np.pi * 6 * t + fases[:, 1])
+                 + rng.normal(0, 15, size=(n_channels, n * sfreq)))
+            muestras = np.clip(np.round(x / fisico * digital), -digital, digital).astype('<i2')
+            # Un registro de datos por segundo: los canales uno tras otro
+            f.write(muestras.reshape(n_channels, n, sfreq).transpose(1, 0, 2).tobytes())
+    return path
@@ -0,0 +1,293 @@
+"""Suite reproducible: carga y cada modo de ``plot_chart`` sobre los EDF de ``data/`` y EDF sintéticos largos.
+
+Corre sin pantalla (Qt ``offscreen``; la figura se dibuja con Agg) sobre
+la ventana real de la aplicación. Por archivo mide:
+
+* ``carga``: ``open_edf`` sin caché (y la pirámide, si el archivo se abre
+  en modo diferido);
+* cada modo del gráfico (muestra, tiempo, frecuencia, espectrograma,
+  bandas, todos los canales, superponer), desde el clic hasta que la
+  figura quedó dibujada. La PSD, las características y la vista de todos
+  los canales se descartan antes de cada repetición, así que siempre se
+  calculan y se arman de cero;
+* ``apilado.resaltar``: con la vista de todos los canales ya armada,
+  cambiar de canal (sólo se actualiza el resaltado).
+
+Reporta percentiles 50/95/99 de latencia, rendimiento (segundos de señal
+procesados por segundo y, en la carga, MB/s del EDF) y memoria pico
+(``tracemalloc``, en una corrida aparte). Los resultados se guardan en
+``benchmarks/results/`` y se comparan con ``results/baseline.json``:
+un caso cuya mediana empeora más que ``--threshold`` (y más que
+``--min-delta-ms``) cuenta como regresión y el proceso termina con error.
+
+Los EDF sintéticos (``--synthetic MINUTOSxCANALES``, con semilla fija)
+se generan una vez en ``benchmarks/synthetic/`` y se reutilizan.
+
+Uso: python benchmarks/run_suite.py [--repeat N] [--files PATRÓN] [--synthetic 30x32 ...]
+                                    [--modes m1,m2] [--no-memory] [--save-baseline] [--threshold 0.25]
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import warnings
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+
+from common import RAIZ, edf_files, write_synthetic_edf
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BENCH_DIR, 'results')
+SYNTHETIC_DIR = os.path.join(BENCH_DIR, 'synthetic')
+BASELINE_FILE = os.path.join(RESULTS_DIR, 'baseline.json')
+
+# Modo -> botón de la ventana, en el orden en que se corren
+MODES = {
+    'muestra': 'muestra_button',
+    'tiempo': 'tiempo_button',
+    'frecuencia': 'frequencia_button',
+    'espectrograma': 'amplitud_button',
+    'bandas': 'bandas_button',
+    'apilado': 'apilado_button',
+    'superponer': 'superponer_button',
+}
+
+# Tamaño fijo de la figura para que el costo de dibujo no dependa de la pantalla
+FIGURE_INCHES = (10, 6)
+FIGURE_DPI = 100
+
+
+def synthetic_files(specs, sfreq):
+    os.makedirs(SYNTHETIC_DIR, exist_ok=True)
+    archivos = []
+    for spec in specs:
+        minutos, canales = (int(v) for v in spec.lower().split('x'))
+        path = os.path.join(SYNTHETIC_DIR, f'sintetico_{minutos}min_{canales}ch_{sfreq}hz.edf')
+        if not os.path.exists(path):
+            print(f"generando {os.path.basename(path)}...")
+            write_synthetic_edf(path + '.tmp', minutos * 60, canales, sfreq)
+            os.replace(path + '.tmp', path)
+        archivos.append(path)
+    return archivos
+
+
+def load(path):
+    from signal_model import finish_lazy_signal, open_edf
+
+    raw, signal = open_edf(path, verbose='ERROR')
+    if signal.pyramids is None:
+        signal = finish_lazy_signal(signal)
+    return raw, signal
+
+
+def peak_memory(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(fn, repeat, memory, prepare=None):
+    # Una corrida de calentamiento, luego ``repeat`` medidas y, aparte, la memoria
+    if prepare:
+        prepare()
+    fn()
+    tiempos = []
+    for _ in range(repeat):
+        if prepare:
+            prepare()
+        inicio = time.perf_counter()
+        fn()
+        tiempos.append(time.perf_counter() - inicio)
+    pico = None
+    if memory:
+        if prepare:
+            prepare()
+        pico = peak_memory(fn)
+    return np.array(tiempos), pico
+
+
+def case_result(tiempos, pico, duracion, mb=None):
+    p50, p95, p99 = np.percentile(tiempos, [50, 95, 99])
+    resultado = {'n': len(tiempos), 'p50_s': p50, 'p95_s': p95, 'p99_s': p99, 'mean_s': float(tiempos.mean()),
+                 'senal_s_por_s': duracion / p50, 'peak_mb': None if pico is None else pico / 1024 ** 2}
+    if mb is not None:
+        resultado['mb_por_s'] = mb / p50
+    return {k: float(v) if isinstance(v, np.floating) else v for k, v in resultado.items()}
+
+
+class GuiDriver:
+    """Ventana de la aplicación sin mostrar, manejada como lo haría un usuario."""
+
+    def __init__(self):
+        from PyQt5.QtCore import QEventLoop
+        from PyQt5.QtWidgets import QApplication
+
+        import Brainbit
+
+        self.app = QApplication.instance() or QApplication([])
+        # El modo muestra llama a legend() sin etiquetas; el aviso se repetiría en cada medida
+        warnings.filterwarnings('ignore', message='No artists with labels found')
+        self.loop_flags = QEventLoop.AllEvents
+        self.errors = []
+        # Los errores se registran en lugar de abrir un diálogo modal
+        Brainbit.QMessageBox.critical = staticmethod(lambda parent, title, message: self.errors.append(message))
+        self.window = Brainbit.BrainBit()
+        self.window.cache = None
+        self.window.session.cache = None
+        self.window.build_plot_area()
+        self.window.figure.set_dpi(FIGURE_DPI)
+        self.window.figure.set_size_inches(*FIGURE_INCHES)
+
+    def wait(self):
+        while self.window.jobs.is_busy():
+            self.app.processEvents(self.loop_flags, 5)
+        self.app.processEvents()
+
+    def open(self, path, raw, signal):
+        w = self.window
+        for anterior in list(w.session.recordings):
+            w.session.remove(anterior)
+        w.session.add(path, raw, signal, w.filter_params)
+        w.show_recording(path)
+        self.wait()
+        self.select_channel(0)
+
+    def prepare(self):
+        # Sin resultados memorizados: cada repetición calcula la PSD y las bandas y arma la vista apilada
+        self.window.signal.psds.clear()
+        self.window.signal.features.clear()
+        self.window.close_stacked()
+
+    def select_channel(self, index):
+        selector = self.window.chart_selector
+        selector.blockSignals(True)
+        selector.setCurrentIndex(index % selector.count())
+        selector.blockSignals(False)
+
+    def plot(self, mode):
+        w = self.window
+        getattr(w, MODES[mode]).setChecked(True)
+        w.range_changed = False
+        w.plot_chart()
+        self.wait()
+        if self.errors:
+            raise RuntimeError(self.errors.pop())
+
+    def next_channel(self):
+        # Con la vista apilada ya armada sólo cambia el canal resaltado
+        self.select_channel(self.window.chart_selector.currentIndex() + 1)
+        self.plot('apilado')
+
+
+def environment():
+    import matplotlib
+    import mne
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=RAIZ, capture_output=True,
+                                text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'fecha': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+            'numpy': np.__version__, 'mne': mne.__version__, 'matplotlib': matplotlib.__version__,
+            'plataforma': platform.platform(), 'procesador': platform.processor() or platform.machine(),
+            'cpus': os.cpu_count()}
+
+
+def compare(casos, baseline, threshold, min_delta):
+    """Casos comunes cuya mediana empeoró más que ``threshold`` (relativo) y ``min_delta`` (s)."""
+    regresiones = []
+    for nombre, caso in casos.items():
+        previo = baseline.get('casos', {}).get(nombre)
+        if previo is None:
+            continue
+        delta = caso['p50_s'] - previo['p50_s']
+        if delta > min_delta and delta > threshold * previo['p50_s']:
+            regresiones.append((nombre, previo['p50_s'], caso['p50_s']))
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10, help="medidas por caso (más una de calentamiento)")
+    parser.add_argument('--files', default='*', help="patrón de los EDF de data/ a incluir ('' para ninguno)")
+    parser.add_argument('--synthetic', action='append', metavar='MINUTOSxCANALES',
+                        help="EDF sintético a incluir (repetible; por defecto 30x32)")
+    parser.add_argument('--sfreq', type=int, default=256, help="frecuencia de muestreo de los sintéticos")
+    parser.add_argument('--modes', default=','.join(MODES), help="modos a medir, separados por comas")
+    parser.add_argument('--no-memory', action='store_true', help="no medir la memoria pico")
+    parser.add_argument('--output', help="archivo de resultados (por defecto results/suite-<fecha>.json)")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="resultados contra los que comparar")
+    parser.add_argument('--save-baseline', action='store_true', help="guardar estos resultados como referencia")
+    parser.add_argument('--threshold', type=float, default=0.25, help="empeoramiento relativo de la mediana tolerado")
+    parser.add_argument('--min-delta-ms', type=float, default=5.0, help="diferencia mínima para contar una regresión")
+    args = parser.parse_args()
+
+    modos = [m for m in args.modes.split(',') if m]
+    desconocidos = set(modos) - set(MODES)
+    if desconocidos:
+        parser.error(f"modos desconocidos: {', '.join(sorted(desconocidos))}")
+    archivos = [p for p in edf_files() if args.files and fnmatch.fnmatch(os.path.basename(p), args.files)]
+    archivos += synthetic_files(args.synthetic or ['30x32'], args.sfreq)
+
+    driver = GuiDriver()
+    casos = {}
+    print(f"{'caso':<50}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'señal s/s':>11}{'MB/s':>7}{'pico MB':>9}")
+    for path in archivos:
+        nombre = os.path.basename(path)
+        mb = os.path.getsize(path) / 1024 ** 2
+        tiempos, pico = measure(lambda: load(path), args.repeat, not args.no_memory)
+        raw, signal = load(path)
+        resultados = {'carga': case_result(tiempos, pico, signal.duration, mb)}
+
+        driver.open(path, raw, signal)
+        for modo in modos:
+            tiempos, pico = measure(lambda: driver.plot(modo), args.repeat, not args.no_memory, driver.prepare)
+            resultados[modo] = case_result(tiempos, pico, signal.duration)
+            if modo == 'apilado':
+                driver.plot(modo)
+                tiempos, pico = measure(driver.next_channel, args.repeat, not args.no_memory)
+                resultados['apilado.resaltar'] = case_result(tiempos, pico, signal.duration)
+                driver.select_channel(0)
+
+        for caso, r in resultados.items():
+            casos[f'{nombre}/{caso}'] = r
+            pico = '-' if r['peak_mb'] is None else f"{r['peak_mb']:.1f}"
+            mb_s = f"{r['mb_por_s']:.1f}" if 'mb_por_s' in r else '-'
+            print(f"{nombre + '/' + caso:<50}{r['p50_s'] * 1e3:>9.1f}{r['p95_s'] * 1e3:>9.1f}{r['p99_s'] * 1e3:>9.1f}"
+                  f"{r['senal_s_por_s']:>11.0f}{mb_s:>7}{pico:>9}")
+
+    resultado = {'entorno': environment(), 'parametros': vars(args), 'casos': casos}
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    salida = args.output or os.path.join(RESULTS_DIR, f"suite-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    for ruta in [salida] + ([BASELINE_FILE] if args.save_baseline else []):
+        with open(ruta, 'w') as f:
+            json.dump(resultado, f, indent=1)
+            f.write('\n')
+    print(f"\nresultados en {salida}")
+
+    if args.save_baseline or not os.path.exists(args.baseline):
+        return
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regresiones = compare(casos, baseline, args.threshold, args.min_delta_ms / 1e3)
+    print(f"comparado con {args.baseline} ({baseline['entorno'].get('commit')}, {baseline['entorno']['fecha']})")
+    for nombre, antes, ahora in regresiones:
+        print(f"  regresión {nombre}: {antes * 1e3:.1f} -> {ahora * 1e3:.1f} ms ({ahora / antes - 1:+.0%})")
+    if regresiones:
+        sys.exit(1)
+    print("  sin regresiones")
+
+
+if __name__ == '__main__':
+    main()
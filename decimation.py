@@ -0,0 +1,322 @@
+import numpy as np
+from matplotlib.collections import LineCollection
+
+
+class MinMaxPyramid:
+    """Pirámide multirresolución de mínimos/máximos de un canal.
+
+    El nivel ``k`` guarda el mínimo y el máximo de cada bloque de
+    ``factor**k`` muestras. Una consulta elige el nivel más grueso que sigue
+    siendo más fino que un píxel y devuelve ~2 puntos por píxel, de modo que
+    el trazo dibujado coincide con el de la señal completa.
+    """
+
+    # Máximo de muestras que se leen de una vez al reducir directamente la señal
+    CHUNK = 1 << 20
+
+    def __init__(self, data, levels, factor, first_level=1):
+        self.data = data
+        self.levels = levels  # [(mins, maxs), ...] desde bloques de factor**first_level
+        self.factor = factor
+        self.first_level = first_level
+
+    @property
+    def n_times(self):
+        return self.data.shape[-1]
+
+    def query(self, start, stop, n_bins):
+        start = max(0, int(start))
+        stop = min(self.n_times, int(stop))
+        n_bins = max(1, int(n_bins))
+        if stop <= start:
+            return np.empty(0), np.empty(0)
+
+        por_bin = (stop - start) / n_bins
+        if por_bin <= 2:
+            # Ventana pequeña: las muestras originales ya caben en pantalla
+            return np.arange(start, stop), self.data[start:stop]
+
+        # Nivel más grueso cuyo bloque no supera el ancho de un píxel
+        nivel = 0
+        bloque = 1
+        ultimo = self.first_level + len(self.levels) - 1
+        while nivel < ultimo and bloque * self.factor <= por_bin:
+            nivel += 1
+            bloque *= self.factor
+
+        if nivel < self.first_level:
+            # Sin nivel precalculado tan fino: se reduce la ventana directamente
+            bloque = 1
+            b0, b1 = start, stop
+            bordes = np.unique(np.linspace(0, stop - start, n_bins + 1)[:-1].astype(np.intp))
+            bin_min, bin_max = self._reduce_source(start, stop, bordes)
+        else:
+            mins, maxs = self.levels[nivel - self.first_level]
+            b0 = start // bloque
+            b1 = -(-stop // bloque)
+            bordes = np.unique(np.linspace(0, b1 - b0, n_bins + 1)[:-1].astype(np.intp))
+            bin_min = np.minimum.reduceat(mins[b0:b1], bordes)
+            bin_max = np.maximum.reduceat(maxs[b0:b1], bordes)
+
+        # Cada bin aporta su mínimo y su máximo, en el inicio y la mitad del bin
+        inicio = (b0 + bordes) * bloque
+        fin = np.append(inicio[1:], min(b1 * bloque, self.n_times))
+        x = np.empty(2 * len(bordes))
+        x[0::2] = inicio
+        x[1::2] = (inicio + fin) / 2
+        y = np.empty(2 * len(bordes), dtype=bin_min.dtype)
+        y[0::2] = bin_min
+        y[1::2] = bin_max
+        return x, y
+
+    def _reduce_source(self, start, stop, bordes):
+        # Recorre la ventana por tramos de a lo sumo CHUNK muestras; un bin puede
+        # repartirse entre dos tramos, por eso se combinan con el resultado previo
+        bin_min = np.full(len(bordes), np.inf)
+        bin_max = np.full(len(bordes), -np.inf)
+        for a in range(0, stop - start, self.CHUNK):
+            b = min(a + self.CHUNK, stop - start)
+            tramo = np.asarray(self.data[start + a:start + b])
+            i0 = int(np.searchsorted(bordes, a, side='right')) - 1
+            i1 = int(np.searchsorted(bordes, b, side='left'))
+            cortes = np.maximum(bordes[i0:i1], a) - a
+            bin_min[i0:i1] = np.minimum(bin_min[i0:i1], np.minimum.reduceat(tramo, cortes))
+            bin_max[i0:i1] = np.maximum(bin_max[i0:i1], np.maximum.reduceat(tramo, cortes))
+        return bin_min, bin_max
+
+
+def _reduce_blocks(mins, maxs, factor):
+    n = mins.shape[-1]
+    completos = n // factor * factor
+    forma = mins.shape[:-1] + (-1, factor)
+    nuevos_min = mins[..., :completos].reshape(forma).min(axis=-1)
+    nuevos_max = maxs[..., :completos].reshape(forma).max(axis=-1)
+    if completos < n:
+        nuevos_min = np.concatenate([nuevos_min, mins[..., completos:].min(axis=-1, keepdims=True)], axis=-1)
+        nuevos_max = np.concatenate([nuevos_max, maxs[..., completos:].max(axis=-1, keepdims=True)], axis=-1)
+    return nuevos_min, nuevos_max
+
+
+def build_levels(data, factor=4, min_size=512):
+    """Calcula los niveles de la pirámide para todos los canales a la vez."""
+    return _build_levels(data, data, factor, min_size)
+
+
+def build_levels_from_chunks(chunks, factor=4, first_level=1, min_size=512):
+    """Calcula los niveles a partir de tramos consecutivos de la señal.
+
+    Cada tramo es una matriz (n_canales, n) cuyo largo es múltiplo de
+    ``factor**first_level`` (salvo el último), de modo que nunca hace falta
+    tener la señal completa en memoria.
+    """
+    bloque = factor ** first_level
+    mins = []
+    maxs = []
+    for tramo in chunks:
+        nuevos_min, nuevos_max = _reduce_blocks(tramo, tramo, bloque)
+        mins.append(nuevos_min)
+        maxs.append(nuevos_max)
+    mins = np.concatenate(mins, axis=-1)
+    maxs = np.concatenate(maxs, axis=-1)
+    return [(mins, maxs)] + _build_levels(mins, maxs, factor, min_size)
+
+
+def _build_levels(mins, maxs, factor, min_size):
+    levels = []
+    while mins.shape[-1] > min_size:
+        mins, maxs = _reduce_blocks(mins, maxs, factor)
+        levels.append((mins, maxs))
+    return levels
+
+
+def build_pyramids(data, factor=4, min_size=512, levels=None, first_level=1):
+    # data: (n_canales, n_muestras); cada pirámide guarda vistas de su fila
+    if levels is None:
+        levels = build_levels(data, factor, min_size)
+    return [
+        MinMaxPyramid(data[i], [(mins[i], maxs[i]) for mins, maxs in levels], factor, first_level)
+        for i in range(len(data))
+    ]
+
+
+class DecimatedLine:
+    """Línea de Matplotlib que se vuelve a consultar en la pirámide al hacer zoom o desplazar.
+
+    ``x0`` y ``dx`` convierten índices de muestra a unidades del eje X
+    (``dx=1`` para muestras, ``dx=1/sfreq`` para segundos).
+    """
+
+    def __init__(self, ax, pyramid, x0=0.0, dx=1.0, start=0, stop=None, **kwargs):
+        self.ax = ax
+        self.pyramid = pyramid
+        self.x0 = x0
+        self.dx = dx
+        self.start = start
+        self.stop = pyramid.n_times if stop is None else stop
+
+        self.line, = ax.plot([], [], **kwargs)
+        ax.set_xlim(self.to_x(self.start), self.to_x(self.stop - 1))
+        self.update()
+
+        # Escala vertical a partir de la envolvente de la ventana inicial
+        _, y = self.pyramid.query(self.start, self.stop, 1)
+        if len(y):
+            margen = (y.max() - y.min()) * 0.05 or 1.0
+            ax.set_ylim(y.min() - margen, y.max() + margen)
+        self._cid = ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+    def to_x(self, index):
+        return self.x0 + index * self.dx
+
+    def to_index(self, x):
+        return (x - self.x0) / self.dx
+
+    def update(self):
+        xmin, xmax = self.ax.get_xlim()
+        start = max(self.start, int(np.floor(self.to_index(xmin))))
+        stop = min(self.stop, int(np.ceil(self.to_index(xmax))) + 1)
+        ancho = max(1, int(self.ax.bbox.width))
+        idx, y = self.pyramid.query(start, stop, ancho)
+        self.line.set_data(self.to_x(idx), y)
+
+    def _on_xlim_changed(self, ax):
+        self.update()
+
+    def remove(self):
+        self.ax.callbacks.disconnect(self._cid)
+        self.line.remove()
+
+
+class BlittedArtist:
+    """Artista animado que se superpone a un fondo guardado de sus ejes (blitting).
+
+    Cada dibujo completo del lienzo guarda el fondo de los ejes sin el
+    artista y lo dibuja encima; ``blit`` restaura ese fondo y redibuja sólo
+    el artista.
+    """
+
+    def __init__(self, ax, artist):
+        self.ax = ax
+        self.artist = artist
+        self.canvas = ax.figure.canvas
+        self.background = None
+        artist.set_animated(True)
+        self._cid = self.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        # También llega al guardar la figura, con otro lienzo (SVG, PDF, ...): ahí no hay fondo
+        # que guardar y el artista se dibuja con el renderer de ese lienzo
+        if event.canvas is self.canvas:
+            self.background = self.canvas.copy_from_bbox(self.ax.bbox)
+        self.artist.draw(event.renderer)
+
+    def blit(self):
+        """Redibuja sólo el artista; ``False`` si aún no hay fondo y hace falta un dibujo completo."""
+        if self.background is None:
+            return False
+        self.canvas.restore_region(self.background)
+        self.ax.draw_artist(self.artist)
+        self.canvas.blit(self.ax.bbox)
+        return True
+
+    def remove(self):
+        self.canvas.mpl_disconnect(self._cid)
+
+
+class StackedLines:
+    """Todos los canales apilados y desplazados en una sola ``LineCollection``.
+
+    Los ejes y la colección se crean una vez: cambiar de archivo o de rango
+    (``set_data``) o de canal resaltado (``highlight``) sólo reemplaza
+    segmentos y colores. La colección es animada, así que cada dibujo
+    completo (al desplazar o hacer zoom) guarda el fondo sin ella y la
+    superpone; los cambios que no mueven los ejes se dibujan con blitting.
+    """
+
+    def __init__(self, ax, color='#060270', highlight_color='C3', linewidth=0.6):
+        self.ax = ax
+        self.color = color
+        self.highlight_color = highlight_color
+        self.linewidth = linewidth
+        self.pyramids = []
+        self.names = []
+        self.offsets = np.empty(0)
+        self.selected = None
+        self.x0 = 0.0
+        self.dx = 1.0
+        self.start = 0
+        self.stop = 0
+
+        self.collection = LineCollection([])
+        ax.add_collection(self.collection)
+        self.blitter = BlittedArtist(ax, self.collection)
+        self._cid_xlim = ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+
+    def set_data(self, pyramids, names, x0=0.0, dx=1.0, start=0, stop=None):
+        """Cambia señal y rango; devuelve ``True`` si los ejes cambiaron y hace falta un dibujo completo."""
+        stop = pyramids[0].n_times if stop is None and pyramids else stop or 0
+        if (len(pyramids) == len(self.pyramids) and all(a is b for a, b in zip(pyramids, self.pyramids))
+                and (x0, dx, start, stop) == (self.x0, self.dx, self.start, self.stop)):
+            return False
+
+        nuevos_canales = list(names) != self.names or len(pyramids) != len(self.pyramids)
+        self.pyramids = list(pyramids)
+        self.names = list(names)
+        self.x0, self.dx, self.start, self.stop = x0, dx, start, stop
+
+        # Separación común: la mediana de la amplitud pico a pico de los canales
+        rangos = []
+        for pyramid in self.pyramids:
+            _, y = pyramid.query(start, stop, 1)
+            rangos.append(y.max() - y.min() if len(y) else 0.0)
+        separacion = float(np.median(rangos)) if rangos else 1.0
+        self.offsets = -np.arange(len(self.pyramids)) * (separacion or 1.0)
+
+        self.ax.set_yticks(self.offsets, self.names)
+        if len(self.offsets):
+            self.ax.set_ylim(self.offsets[-1] - separacion, self.offsets[0] + separacion)
+        self.ax.set_xlim(self.to_x(start), self.to_x(max(start, stop - 1)), emit=False)
+        if nuevos_canales:
+            self._apply_styles()
+        self.update()
+        return True
+
+    def to_x(self, index):
+        return self.x0 + index * self.dx
+
+    def to_index(self, x):
+        return (x - self.x0) / self.dx
+
+    def update(self):
+        xmin, xmax = self.ax.get_xlim()
+        start = max(self.start, int(np.floor(self.to_index(xmin))))
+        stop = min(self.stop, int(np.ceil(self.to_index(xmax))) + 1)
+        ancho = max(1, int(self.ax.bbox.width))
+        segmentos = []
+        for pyramid, desplazamiento in zip(self.pyramids, self.offsets):
+            idx, y = pyramid.query(start, stop, ancho)
+            segmentos.append(np.column_stack((self.to_x(idx), y + desplazamiento)))
+        self.collection.set_segments(segmentos)
+
+    def highlight(self, name):
+        # Resaltar otro canal sólo cambia colores y grosores de la colección
+        self.selected = name
+        self._apply_styles()
+
+    def _apply_styles(self):
+        resaltado = [n == self.selected for n in self.names]
+        self.collection.set_colors([self.highlight_color if r else self.color for r in resaltado])
+        self.collection.set_linewidths([2 * self.linewidth if r else self.linewidth for r in resaltado])
+
+    def refresh(self):
+        """Redibuja sólo la colección sobre el fondo guardado."""
+        if not self.blitter.blit():
+            self.ax.figure.canvas.draw_idle()
+
+    def _on_xlim_changed(self, ax):
+        self.update()
+
+    def remove(self):
+        self.ax.callbacks.disconnect(self._cid_xlim)
+        self.blitter.remove()
+        self.collection.remove()
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Se incrementa cuando cambia el formato o el cálculo de lo guardado: invalida todo lo anterior
+CACHE_VERSION = 1
+
+DEFAULT_CACHE_DIR = os.environ.get('BRAINBIT_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.brainbit', 'cache'))
+DEFAULT_MAX_BYTES = int(os.environ.get('BRAINBIT_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+
+_META = 'meta.json'
+_HASHES = 'hashes.json'
+
+
+def file_hash(path, progress=None, block=1 << 22):
+    """SHA-256 del contenido del archivo, leído por bloques."""
+    total = os.path.getsize(path) or 1
+    leido = 0
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for bloque in iter(lambda: f.read(block), b''):
+            h.update(bloque)
+            leido += len(bloque)
+            if progress:
+                progress(100 * leido // total, "Calculando huella del archivo")
+    return h.hexdigest()
+
+
+class CacheWriter:
+    """Entrada en construcción; sólo es visible en la caché tras ``commit()``."""
+
+    def __init__(self, cache, key, meta):
+        self.cache = cache
+        self.key = key
+        self.meta = dict(meta, version=CACHE_VERSION, key=key, arrays={})
+        self.path = tempfile.mkdtemp(prefix='.tmp-', dir=cache.root)
+
+    def create(self, name, shape, dtype):
+        # Arreglo en disco que se llena por tramos (np.lib.format, legible con np.load)
+        shape = tuple(int(n) for n in shape)
+        self.meta['arrays'][name] = {'shape': list(shape), 'dtype': np.dtype(dtype).str}
+        return np.lib.format.open_memmap(os.path.join(self.path, name + '.npy'), mode='w+', dtype=dtype, shape=shape)
+
+    def add(self, name, array):
+        array = np.ascontiguousarray(array)
+        self.meta['arrays'][name] = {'shape': list(array.shape), 'dtype': array.dtype.str}
+        np.save(os.path.join(self.path, name + '.npy'), array)
+
+    def commit(self):
+        with open(os.path.join(self.path, _META), 'w') as f:
+            json.dump(self.meta, f)
+        destino = self.cache.entry_path(self.key)
+        shutil.rmtree(destino, ignore_errors=True)
+        os.replace(self.path, destino)
+        self.cache.evict(keep=self.key)
+
+    def abort(self):
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class DiskCache:
+    """Caché en disco de señales filtradas y datos derivados.
+
+    Cada entrada es un directorio con un ``meta.json`` y un ``.npy`` por
+    arreglo, identificado por la huella del EDF y los parámetros de filtro.
+    Las entradas se abren como memmap y se descartan por orden de último
+    acceso (mtime de ``meta.json``) cuando se supera ``max_bytes``.
+    """
+
+    def __init__(self, root=None, max_bytes=None):
+        self.root = root or DEFAULT_CACHE_DIR
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max_bytes
+        os.makedirs(self.root, exist_ok=True)
+
+    def entry_path(self, key):
+        return os.path.join(self.root, key)
+
+    def key_for(self, path, l_freq, h_freq, progress=None):
+        huella = self.content_hash(path, progress)
+        texto = f"{huella}:{l_freq}:{h_freq}:{CACHE_VERSION}"
+        return hashlib.sha256(texto.encode()).hexdigest()[:32]
+
+    def content_hash(self, path, progress=None):
+        # La huella se recuerda por (ruta, tamaño, mtime) para no releer archivos que no cambiaron
+        st = os.stat(path)
+        firma = f"{os.path.abspath(path)}|{st.st_size}|{st.st_mtime_ns}"
+        huella = self._read_hashes().get(firma)
+        if huella is None:
+            huella = file_hash(path, progress)
+            self._remember_hash(firma, huella)
+        return huella
+
+    def _read_hashes(self):
+        try:
+            with open(os.path.join(self.root, _HASHES)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _remember_hash(self, firma, huella):
+        # Varios procesos (batch.py -j N) actualizan el índice a la vez: se relee justo antes de
+        # escribir, cada uno usa su propio temporal, y si la escritura falla sólo se pierde el
+        # atajo (la huella se vuelve a calcular la próxima vez)
+        indice = self._read_hashes()
+        indice[firma] = huella
+        fd, tmp = tempfile.mkstemp(prefix='.hashes-', suffix='.tmp', dir=self.root)
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(indice, f)
+            os.replace(tmp, os.path.join(self.root, _HASHES))
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def writer(self, key, meta=None):
+        return CacheWriter(self, key, meta or {})
+
+    def load(self, key):
+        """Devuelve ``(meta, {nombre: memmap})`` o ``None`` si la entrada falta o no es válida."""
+        path = self.entry_path(key)
+        try:
+            with open(os.path.join(path, _META)) as f:
+                meta = json.load(f)
+            if meta.get('version') != CACHE_VERSION or meta.get('key') != key:
+                raise ValueError("versión de caché distinta")
+            arrays = {}
+            for nombre, info in meta['arrays'].items():
+                arr = np.load(os.path.join(path, nombre + '.npy'), mmap_mode='r')
+                if list(arr.shape) != info['shape'] or arr.dtype.str != info['dtype']:
+                    raise ValueError(f"arreglo {nombre} incompleto")
+                arrays[nombre] = arr
+        except FileNotFoundError:
+            if os.path.isdir(path):
+                self.remove(key)
+            return None
+        except (OSError, ValueError, KeyError):
+            # Entrada dañada u obsoleta: se elimina para que se reconstruya
+            self.remove(key)
+            return None
+        os.utime(os.path.join(path, _META))
+        return meta, arrays
+
+    def add_arrays(self, key, arrays):
+        # Agrega datos derivados (p. ej. espectros) a una entrada existente
+        path = self.entry_path(key)
+        meta_path = os.path.join(path, _META)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        for nombre, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            tmp = os.path.join(path, f".{nombre}.tmp.npy")
+            np.save(tmp, array)
+            os.replace(tmp, os.path.join(path, nombre + '.npy'))
+            meta['arrays'][nombre] = {'shape': list(array.shape), 'dtype': array.dtype.str}
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+        self.evict(keep=key)
+        return True
+
+    def remove(self, key):
+        shutil.rmtree(self.entry_path(key), ignore_errors=True)
+
+    def entries(self):
+        """Lista ``(último acceso, bytes, clave)`` de las entradas completas."""
+        resultado = []
+        for nombre in os.listdir(self.root):
+            path = os.path.join(self.root, nombre)
+            meta_path = os.path.join(path, _META)
+            if nombre.startswith('.') or not os.path.isfile(meta_path):
+                continue
+            tamaño = sum(e.stat().st_size for e in os.scandir(path) if e.is_file())
+            resultado.append((os.path.getmtime(meta_path), tamaño, nombre))
+        return resultado
+
+    def size(self):
+        return sum(tamaño for _, tamaño, _ in self.entries())
+
+    def evict(self, keep=None):
+        entradas = sorted(self.entries())
+        total = sum(tamaño for _, tamaño, _ in entradas)
+        for _, tamaño, clave in entradas:
+            if total <= self.max_bytes:
+                break
+            if clave == keep:
+                continue
+            self.remove(clave)
+            if not os.path.exists(self.entry_path(clave)):
+                total -= tamaño
+
+    def clear(self):
+        for _, _, clave in self.entries():
+            self.remove(clave)
@@ -0,0 +1,215 @@
+"""Exportación columnar de señales filtradas, espectros y características por bandas.
+
+Formatos:
+
+* ``f32``: un directorio con ``header.json`` y un archivo binario float32
+  por arreglo (la señal canal por canal, de forma (n_canales, n_muestras)),
+  que cualquier herramienta abre sin copiar con ``np.memmap`` (ver
+  ``open_f32_export``).
+* ``parquet`` y ``arrow`` (Arrow IPC): una tabla por arreglo, con una
+  columna float32 por canal. Requieren ``pyarrow``, que es opcional.
+
+La señal se recorre en tramos de ``EXPORT_CHUNK`` muestras (un grupo de
+filas o un lote por tramo), de modo que nunca se arma la tabla completa
+en memoria.
+"""
+import importlib.util
+import json
+import os
+
+import numpy as np
+
+from band_power import signal_band_features
+from spectral import signal_psd
+from telemetry import add_bytes, stage
+
+EXPORT_FORMATS = ('f32', 'parquet', 'arrow')
+EXPORT_PARTS = ('senal', 'psd', 'caracteristicas')
+
+# Muestras por tramo (y por grupo de filas o lote en Parquet/Arrow)
+EXPORT_CHUNK = 1 << 16
+
+F32_VERSION = 1
+
+
+def arrow_available():
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+def available_formats():
+    return [f for f in EXPORT_FORMATS if f == 'f32' or arrow_available()]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Exportar a Parquet o Arrow requiere pyarrow (pip install pyarrow).") from None
+    return pyarrow
+
+
+def _signal_chunks(signal, chunk, progress=None):
+    for start in range(0, signal.n_times, chunk):
+        stop = min(start + chunk, signal.n_times)
+        if progress:
+            progress(100 * start // max(1, signal.n_times), "Exportando la señal")
+        x = np.asarray(signal.read(start, stop), dtype=np.float32)
+        add_bytes(x.nbytes)
+        yield start, stop, x
+
+
+def _feature_columns(features):
+    # Columnas numéricas en float32; el canal se guarda como índice en ``ch_names``
+    return [n for n in features.dtype.names if n != 'channel']
+
+
+class _F32Writer:
+    """Directorio de exportación ``f32``: ``header.json`` más un binario por arreglo."""
+
+    def __init__(self, path, signal, filter_params=None):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.header = {
+            'format': 'brainbit-f32',
+            'version': F32_VERSION,
+            'sfreq': signal.sfreq,
+            'ch_names': signal.ch_names,
+            'n_times': int(signal.n_times),
+            'unit': 'V',
+            'filter': list(filter_params) if filter_params else None,
+            'arrays': {},
+        }
+
+    def create(self, name, shape, columns=None):
+        shape = tuple(int(n) for n in shape)
+        archivo = name + '.f32'
+        self.header['arrays'][name] = {'file': archivo, 'dtype': '<f4', 'shape': list(shape), 'order': 'C'}
+        if columns is not None:
+            self.header['arrays'][name]['columns'] = list(columns)
+        return np.memmap(os.path.join(self.path, archivo), dtype='<f4', mode='w+', shape=shape)
+
+    def close(self):
+        tmp = os.path.join(self.path, 'header.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(self.header, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, 'header.json'))
+        return os.path.join(self.path, 'header.json')
+
+
+def open_f32_export(path):
+    """Abre una exportación ``f32``: devuelve ``(header, {nombre: memmap})`` sin leer los datos."""
+    with open(os.path.join(path, 'header.json')) as f:
+        header = json.load(f)
+    arrays = {
+        nombre: np.memmap(os.path.join(path, info['file']), dtype=info['dtype'], mode='r', shape=tuple(info['shape']))
+        for nombre, info in header['arrays'].items()
+    }
+    return header, arrays
+
+
+def export_f32(signal, path, psd=None, features=None, filter_params=None, chunk=EXPORT_CHUNK, progress=None):
+    writer = _F32Writer(path, signal, filter_params)
+    data = writer.create('senal', (len(signal.ch_names), signal.n_times))
+    for start, stop, x in _signal_chunks(signal, chunk, progress):
+        data[:, start:stop] = x
+    data.flush()
+    del data
+
+    if psd is not None:
+        freqs, valores = psd
+        writer.create('psd_freqs', freqs.shape)[:] = freqs
+        writer.create('psd', valores.shape)[:] = valores
+    if features is not None:
+        columnas = _feature_columns(features)
+        tabla = writer.create('caracteristicas', (len(features), len(columnas) + 1), ['channel_index'] + columnas)
+        indice = {nombre: i for i, nombre in enumerate(signal.ch_names)}
+        tabla[:, 0] = [indice[c] for c in features['channel']]
+        for j, columna in enumerate(columnas, 1):
+            tabla[:, j] = features[columna]
+        tabla.flush()
+    return [writer.close()]
+
+
+def _schema_metadata(signal, filter_params):
+    return {'sfreq': str(signal.sfreq), 'unit': 'V',
+            'filter': json.dumps(list(filter_params) if filter_params else None)}
+
+
+class _ArrowTableWriter:
+    """Escribe lotes en un archivo Parquet (un grupo de filas por lote) o Arrow IPC."""
+
+    def __init__(self, pa, path, schema, fmt):
+        self.path = path
+        if fmt == 'parquet':
+            self.writer = pa.parquet.ParquetWriter(path, schema)
+        else:
+            self.writer = pa.ipc.new_file(path, schema)
+
+    def write(self, batch):
+        self.writer.write_batch(batch)
+
+    def close(self):
+        self.writer.close()
+        return self.path
+
+
+def export_arrow(signal, prefix, fmt='parquet', psd=None, features=None, filter_params=None, chunk=EXPORT_CHUNK,
+                 progress=None):
+    """Escribe ``<prefix>_senal``, ``_psd`` y ``_caracteristicas`` como ``.parquet`` o ``.arrow``."""
+    pa = _pyarrow()
+    extension = '.parquet' if fmt == 'parquet' else '.arrow'
+    metadata = _schema_metadata(signal, filter_params)
+    salidas = []
+
+    campos = [pa.field('time_s', pa.float64())] + [pa.field(c, pa.float32()) for c in signal.ch_names]
+    schema = pa.schema(campos, metadata=metadata)
+    writer = _ArrowTableWriter(pa, prefix + '_senal' + extension, schema, fmt)
+    try:
+        for start, stop, x in _signal_chunks(signal, chunk, progress):
+            columnas = [pa.array(np.arange(start, stop) / signal.sfreq)] + [pa.array(fila) for fila in x]
+            writer.write(pa.record_batch(columnas, schema=schema))
+    finally:
+        salidas.append(writer.close())
+
+    if psd is not None:
+        freqs, valores = psd
+        schema = pa.schema([pa.field('freq_hz', pa.float64())] + [pa.field(c, pa.float32()) for c in signal.ch_names],
+                           metadata=dict(metadata, unit='V^2/Hz'))
+        columnas = [pa.array(freqs)] + [pa.array(fila.astype(np.float32)) for fila in valores]
+        writer = _ArrowTableWriter(pa, prefix + '_psd' + extension, schema, fmt)
+        writer.write(pa.record_batch(columnas, schema=schema))
+        salidas.append(writer.close())
+
+    if features is not None:
+        nombres = _feature_columns(features)
+        schema = pa.schema([pa.field('channel', pa.string())] + [pa.field(n, pa.float32()) for n in nombres],
+                           metadata=dict(metadata, unit='uV^2'))
+        columnas = [pa.array(features['channel'].tolist(), pa.string())]
+        columnas += [pa.array(features[n].astype(np.float32)) for n in nombres]
+        writer = _ArrowTableWriter(pa, prefix + '_caracteristicas' + extension, schema, fmt)
+        writer.write(pa.record_batch(columnas, schema=schema))
+        salidas.append(writer.close())
+    return salidas
+
+
+def export_recording(signal, output_dir, name, fmt='f32', parts=EXPORT_PARTS, n_fft=2048, filter_params=None,
+                     cache=None, chunk=EXPORT_CHUNK, progress=None):
+    """Exporta la señal filtrada, su PSD y sus características por bandas.
+
+    ``parts`` elige qué se escribe (``'senal'``, ``'psd'``,
+    ``'caracteristicas'``; la señal siempre se incluye). La PSD y las
+    características se calculan una vez por señal y se reutilizan si ya
+    estaban. Devuelve las rutas escritas.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato de exportación desconocido: {fmt}. Use uno de {', '.join(EXPORT_FORMATS)}.")
+    os.makedirs(output_dir, exist_ok=True)
+    psd = signal_psd(signal, n_fft, cache) if 'psd' in parts else None
+    features = signal_band_features(signal) if 'caracteristicas' in parts else None
+    with stage('exportar'):
+        if fmt == 'f32':
+            return export_f32(signal, os.path.join(output_dir, name), psd, features, filter_params, chunk, progress)
+        return export_arrow(signal, os.path.join(output_dir, name), fmt, psd, features, filter_params, chunk,
+                            progress)
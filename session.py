@@ -0,0 +1,162 @@
+import mmap
+import os
+from collections import OrderedDict
+
+import numpy as np
+
+# Memoria para señales decodificadas y filtradas de la sesión; lo que exceda se pasa a disco
+DEFAULT_SESSION_BYTES = int(os.environ.get('BRAINBIT_SESSION_MAX_BYTES', 512 * 1024 ** 2))
+
+
+def _root(array):
+    while isinstance(array, np.ndarray) and isinstance(array.base, np.ndarray):
+        array = array.base
+    return array
+
+
+def resident_bytes(signal):
+    """Bytes que la señal ocupa en memoria propia.
+
+    Los arreglos abiertos como memmap y las lecturas del archivo en modo
+    diferido no cuentan: de esas páginas se encarga el sistema operativo.
+    Las vistas que comparten memoria se cuentan una sola vez.
+    """
+    arreglos = [signal.data]
+    for pyramid in signal.pyramids or []:
+        for mins, maxs in pyramid.levels:
+            arreglos += [mins, maxs]
+    for freqs, psd in signal.psds.values():
+        arreglos += [freqs, psd]
+    arreglos += list(signal.features.values())
+
+    total = 0
+    vistos = set()
+    for arreglo in arreglos:
+        raiz = _root(arreglo)
+        if not isinstance(raiz, np.ndarray) or id(raiz) in vistos:
+            continue
+        vistos.add(id(raiz))
+        if isinstance(raiz, np.memmap) or isinstance(raiz.base, mmap.mmap):
+            continue
+        total += raiz.nbytes
+    return total
+
+
+class Recording:
+    """Un archivo abierto en la sesión y el modelo de señal con que se grafica."""
+
+    def __init__(self, path, raw, signal, filter_params):
+        self.path = path
+        self.name = os.path.basename(path)
+        self.raw = raw
+        self.signal = signal
+        self.filter_params = filter_params
+        self.nbytes = resident_bytes(signal)
+
+    @property
+    def state(self):
+        from signal_model import LazySignalModel
+
+        if isinstance(self.signal, LazySignalModel):
+            return 'diferido'
+        return 'memoria' if self.nbytes else 'disco'
+
+
+class Session:
+    """Grabaciones abiertas a la vez, con la memoria acotada por orden de uso (LRU).
+
+    Cada grabación conserva un modelo de señal utilizable, de modo que
+    volver a una ya abierta no decodifica ni filtra nada. Cuando las
+    señales en memoria superan ``max_bytes`` se desalojan las usadas hace
+    más tiempo: pasan a la caché en disco (memmap) o, sin caché, a un
+    modelo diferido que lee el EDF por ventanas.
+    """
+
+    def __init__(self, cache=None, max_bytes=None):
+        self.cache = cache
+        self.max_bytes = DEFAULT_SESSION_BYTES if max_bytes is None else max_bytes
+        self.recordings = OrderedDict()  # ruta -> Recording, de la menos a la más usada
+
+    def __contains__(self, path):
+        return path in self.recordings
+
+    def __len__(self):
+        return len(self.recordings)
+
+    def __iter__(self):
+        return iter(list(self.recordings.values()))
+
+    def add(self, path, raw, signal, filter_params):
+        self.recordings[path] = Recording(path, raw, signal, filter_params)
+        self.recordings.move_to_end(path)
+        self.trim(keep=path)
+        return self.recordings[path]
+
+    def get(self, path):
+        recording = self.recordings[path]
+        self.recordings.move_to_end(path)
+        return recording
+
+    def update(self, path, signal):
+        # Reemplaza el modelo (p. ej. cuando termina la pirámide de un archivo diferido)
+        if path in self.recordings:
+            recording = self.recordings[path]
+            recording.signal = signal
+            recording.nbytes = resident_bytes(signal)
+            self.trim(keep=path)
+
+    def remove(self, path):
+        self.recordings.pop(path, None)
+
+    def memory_bytes(self):
+        return sum(r.nbytes for r in self.recordings.values())
+
+    def trim(self, keep=None):
+        for path in list(self.recordings):
+            if self.memory_bytes() <= self.max_bytes:
+                break
+            recording = self.recordings[path]
+            if path != keep and recording.state == 'memoria':
+                self.evict(recording)
+
+    def evict(self, recording):
+        signal = self._offload(recording)
+        signal.psds.update(recording.signal.psds)
+        signal.features.update(recording.signal.features)
+        recording.signal = signal
+        recording.raw = None
+        recording.nbytes = resident_bytes(signal)
+
+    def _offload(self, recording):
+        # Se importa aquí para que abrir una sesión vacía no cargue mne ni scipy
+        import mne
+        from signal_model import STORED_FIRST_LEVEL, LazySignalModel, load_cached_signal, store_signal
+
+        signal = recording.signal
+        if self.cache is not None and signal.cache_key is not None:
+            cached = load_cached_signal(self.cache, signal.cache_key)
+            if cached is None:
+                try:
+                    store_signal(self.cache, signal.cache_key, signal)
+                except OSError:
+                    pass
+                else:
+                    cached = load_cached_signal(self.cache, signal.cache_key)
+            if cached is not None:
+                return cached
+
+        # Sin caché: se vuelve a abrir el EDF sin precargar y se conservan
+        # sólo los niveles gruesos de la pirámide
+        raw = mne.io.read_raw_edf(recording.path, preload=False, verbose='ERROR')
+        lazy = LazySignalModel(raw, *recording.filter_params)
+        lazy.cache_key = signal.cache_key
+        if signal.pyramids:
+            desde = STORED_FIRST_LEVEL - signal.pyramids[0].first_level
+            niveles = len(signal.pyramids[0].levels)
+            if desde >= 0:
+                lazy.set_levels([
+                    (np.stack([p.levels[k][0] for p in signal.pyramids]),
+                     np.stack([p.levels[k][1] for p in signal.pyramids]))
+                    for k in range(desde, niveles)
+                ])
+        return lazy
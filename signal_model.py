@@ -0,0 +1,361 @@
+import os
+
+import mne
+import numpy as np
+from scipy.signal import oaconvolve
+
+from decimation import build_levels, build_levels_from_chunks, build_pyramids
+from telemetry import stage
+
+# A partir de este tamaño los archivos se abren sin cargarlos en memoria
+LAZY_THRESHOLD_BYTES = 256 * 1024 ** 2
+
+# Los niveles de pirámide guardados en disco empiezan en bloques de 4**4 muestras;
+# para zooms más finos se lee la señal (memmap o archivo) directamente
+STORED_FIRST_LEVEL = 4
+
+
+class SignalModel:
+    """Matriz de muestras de una grabación, construida una sola vez por archivo.
+
+    Todas las lecturas por canal devuelven vistas sobre ``data``, de modo que
+    graficar un canal nunca copia más que las muestras de ese canal.
+    """
+
+    def __init__(self, data, times, sfreq, ch_names):
+        self.data = data  # (n_canales, n_muestras)
+        self.times = times
+        self.sfreq = float(sfreq)
+        self.ch_names = list(ch_names)
+        self._index = {nombre: i for i, nombre in enumerate(self.ch_names)}
+        self.pyramids = None
+        self.cache_key = None
+        self.psds = {}  # n_fft -> (frecuencias, psd de todos los canales)
+        self.features = {}  # (época_s, paso_s) -> características por bandas
+
+    @classmethod
+    def from_raw(cls, raw):
+        # Con preload la matriz ya está en memoria: se reutiliza para no duplicarla
+        if raw.preload:
+            data = raw._data
+        else:
+            with stage('edf.get_data') as etapa:
+                data = raw.get_data()
+                if etapa:
+                    etapa.nbytes += data.nbytes
+        return cls(data, raw.times, raw.info['sfreq'], raw.ch_names)
+
+    @property
+    def n_times(self):
+        return self.data.shape[1]
+
+    @property
+    def duration(self):
+        return self.times[-1] if self.n_times else 0.0
+
+    def channel_index(self, name):
+        try:
+            return self._index[name]
+        except KeyError:
+            raise ValueError(f"El canal {name} no existe en el archivo cargado.")
+
+    def channel(self, name):
+        # Vista de una fila: no copia datos
+        return self.data[self.channel_index(name)]
+
+    def sample_range(self, tmin, tmax):
+        # Índices [start, stop) de las muestras con tmin < t < tmax, sin recorrer la señal
+        start = int(np.searchsorted(self.times, tmin, side='right'))
+        stop = int(np.searchsorted(self.times, tmax, side='left'))
+        return start, stop
+
+    def window(self, name, start, stop):
+        # Vista de la ventana [start, stop) de un canal
+        return self.data[self.channel_index(name), start:stop]
+
+    def read(self, start, stop, picks=None):
+        # Ventana [start, stop) de todos los canales (o de los índices en picks)
+        if picks is None:
+            return self.data[:, start:stop]
+        return self.data[picks, start:stop]
+
+    def build_pyramids(self, progress=None):
+        # Pirámides min/max para dibujar canales largos sin pasar todas las muestras
+        with stage('piramides'):
+            self.pyramids = build_pyramids(self.data)
+
+    def pyramid(self, name):
+        if self.pyramids is None:
+            self.build_pyramids()
+        return self.pyramids[self.channel_index(name)]
+
+
+class LazyChannel:
+    """Canal filtrado que se lee del archivo al indexarlo con un slice."""
+
+    def __init__(self, signal, index):
+        self.signal = signal
+        self.index = index
+
+    @property
+    def shape(self):
+        return (self.signal.n_times,)
+
+    def __getitem__(self, key):
+        start, stop, step = key.indices(self.signal.n_times)
+        return self.signal.read(start, stop, picks=[self.index])[0, ::step]
+
+
+class LazySignalModel(SignalModel):
+    """Modelo de señal que lee y filtra el EDF por ventanas, sin cargarlo entero.
+
+    Cada lectura toma del archivo la ventana pedida más un margen de medio
+    filtro a cada lado y aplica el mismo FIR de fase cero que ``raw.filter``
+    (overlap-save), de modo que la memoria usada depende de la ventana y no
+    de la duración de la grabación.
+    """
+
+    # Muestras por tramo al recorrer el archivo completo
+    CHUNK = 1 << 18
+
+    def __init__(self, raw, l_freq, h_freq):
+        super().__init__(None, None, raw.info['sfreq'], raw.ch_names)
+        self.raw = raw
+        self._n_times = raw.n_times
+        self.kernel = mne.filter.create_filter(None, self.sfreq, l_freq, h_freq, verbose='ERROR')
+        self.margin = (len(self.kernel) - 1) // 2
+
+    @property
+    def n_times(self):
+        return self._n_times
+
+    @property
+    def duration(self):
+        return (self.n_times - 1) / self.sfreq
+
+    @property
+    def times(self):
+        return np.arange(self.n_times) / self.sfreq
+
+    @times.setter
+    def times(self, value):
+        pass
+
+    def sample_range(self, tmin, tmax):
+        # Mismo criterio estricto que searchsorted, calculado con sfreq
+        start = min(self.n_times, max(0, int(np.floor(tmin * self.sfreq)) + 1))
+        stop = min(self.n_times, max(0, int(np.ceil(tmax * self.sfreq))))
+        return start, stop
+
+    def read(self, start, stop, picks=None):
+        start = max(0, start)
+        stop = min(self.n_times, stop)
+        inicio = max(0, start - self.margin)
+        fin = min(self.n_times, stop + self.margin)
+        with stage('edf.get_data') as etapa:
+            x = self.raw.get_data(picks=picks, start=inicio, stop=fin)
+            if etapa:
+                etapa.nbytes += x.nbytes
+
+        with stage('edf.filtrar') as etapa:
+            # En los bordes de la grabación se refleja la señal, igual que raw.filter
+            relleno = (self.margin - (start - inicio), self.margin - (fin - stop))
+            if any(relleno):
+                x = np.pad(x, ((0, 0), relleno), mode='reflect', reflect_type='odd')
+            y = oaconvolve(x, self.kernel[np.newaxis, :], mode='valid', axes=-1)
+            if etapa:
+                etapa.nbytes += y.nbytes
+        return y
+
+    def chunks(self, picks=None, progress=None):
+        for start in range(0, self.n_times, self.CHUNK):
+            if progress:
+                progress(100 * start // self.n_times, "Recorriendo el archivo")
+            yield self.read(start, start + self.CHUNK, picks)
+
+    def channel(self, name):
+        # Lee el canal completo, ya filtrado
+        return self.read(0, self.n_times, picks=[self.channel_index(name)])[0]
+
+    def window(self, name, start, stop):
+        return self.read(start, stop, picks=[self.channel_index(name)])[0]
+
+    def build_pyramids(self, progress=None):
+        # Un recorrido por tramos; los niveles empiezan en STORED_FIRST_LEVEL
+        # para que la pirámide ocupe una fracción pequeña de la señal
+        with stage('piramides'):
+            levels = build_levels_from_chunks(self.chunks(progress=progress), first_level=STORED_FIRST_LEVEL)
+            self.set_levels(levels)
+
+    def set_levels(self, levels):
+        canales = [LazyChannel(self, i) for i in range(len(self.ch_names))]
+        self.pyramids = build_pyramids(canales, levels=levels, first_level=STORED_FIRST_LEVEL)
+
+    def pyramid(self, name):
+        if self.pyramids is None:
+            # Hasta tener la pirámide, las consultas leen la ventana visible del archivo; para la
+            # grabación completa eso es recorrerla entera, por eso la interfaz espera la pirámide
+            return build_pyramids([LazyChannel(self, self.channel_index(name))], levels=[])[0]
+        return self.pyramids[self.channel_index(name)]
+
+
+def _cache_meta(signal):
+    return {'sfreq': signal.sfreq, 'ch_names': signal.ch_names, 'n_times': int(signal.n_times),
+            'factor': 4, 'first_level': STORED_FIRST_LEVEL}
+
+
+def _add_levels(writer, levels):
+    writer.meta['n_levels'] = len(levels)
+    for i, (mins, maxs) in enumerate(levels):
+        writer.add(f'level{i}_min', mins.astype(np.float32))
+        writer.add(f'level{i}_max', maxs.astype(np.float32))
+
+
+def load_cached_signal(cache, key):
+    """Abre una señal de la caché como memmap; ``None`` si no está o no es válida."""
+    entrada = cache.load(key)
+    if entrada is None:
+        return None
+    meta, arrays = entrada
+    data = arrays['data']
+    signal = SignalModel(data, np.arange(data.shape[1]) / meta['sfreq'], meta['sfreq'], meta['ch_names'])
+    levels = [(arrays[f'level{i}_min'], arrays[f'level{i}_max']) for i in range(meta['n_levels'])]
+    signal.pyramids = build_pyramids(data, factor=meta['factor'], levels=levels, first_level=meta['first_level'])
+    signal.cache_key = key
+    for nombre in meta['arrays']:
+        if nombre.startswith('psd') and not nombre.endswith('_freqs'):
+            signal.psds[int(nombre[3:])] = (arrays[nombre + '_freqs'], arrays[nombre])
+    return signal
+
+
+def _entry_bytes(signal):
+    # Lo que ocupará la entrada: la señal en float32 más mínimos y máximos de cada nivel guardado
+    n_canales = len(signal.ch_names)
+    total = n_canales * signal.n_times
+    bloques = -(-signal.n_times // 4 ** STORED_FIRST_LEVEL)
+    total += 2 * n_canales * bloques
+    while bloques > 512:
+        bloques = -(-bloques // 4)
+        total += 2 * n_canales * bloques
+    # Más un margen para meta.json y las cabeceras de los .npy
+    return total * np.dtype(np.float32).itemsize + 64 * 1024
+
+
+def _fits_in_cache(cache, signal):
+    # La entrada recién escrita nunca se descarta, así que una más grande que todo el límite
+    # quedaría para siempre por encima de él: esas señales no se guardan
+    return _entry_bytes(signal) <= cache.max_bytes
+
+
+def store_signal(cache, key, signal):
+    # Señal filtrada en float32 y niveles gruesos de la pirámide
+    if not _fits_in_cache(cache, signal):
+        return
+    writer = cache.writer(key, _cache_meta(signal))
+    try:
+        writer.add('data', signal.data.astype(np.float32))
+        _add_levels(writer, build_levels(signal.data)[STORED_FIRST_LEVEL - 1:])
+        writer.commit()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def finish_lazy_signal(signal, cache=None, progress=None):
+    """Completa un ``LazySignalModel`` recorriendo el archivo una vez.
+
+    Con caché, la señal filtrada se escribe en disco mientras se construye
+    la pirámide y se devuelve el modelo abierto como memmap; sin caché, o
+    si la señal no entra en ``cache.max_bytes``, se devuelve el mismo
+    modelo con su pirámide.
+    """
+    if cache is None or signal.cache_key is None or not _fits_in_cache(cache, signal):
+        signal.build_pyramids(progress)
+        return signal
+
+    writer = cache.writer(signal.cache_key, _cache_meta(signal))
+    try:
+        data = writer.create('data', (len(signal.ch_names), signal.n_times), np.float32)
+
+        def tramos():
+            pos = 0
+            for tramo in signal.chunks(progress=progress):
+                data[:, pos:pos + tramo.shape[1]] = tramo
+                pos += tramo.shape[1]
+                yield tramo
+
+        levels = build_levels_from_chunks(tramos(), first_level=STORED_FIRST_LEVEL)
+        data.flush()
+        del data
+        _add_levels(writer, levels)
+        writer.commit()
+    except BaseException:
+        writer.abort()
+        raise
+
+    cached = load_cached_signal(cache, signal.cache_key)
+    if cached is None:
+        signal.set_levels(levels)
+        return signal
+    cached.psds.update(signal.psds)
+    cached.features.update(signal.features)
+    return cached
+
+
+def _no_progress(percent, message=""):
+    pass
+
+
+def open_edf(path, l_freq=0.1, h_freq=100.0, progress=None, lazy=None, cache=None, verbose='DEBUG'):
+    """Carga y filtra un archivo EDF y construye su modelo de señal.
+
+    ``progress(percent, message)`` se llama entre etapas; puede lanzar una
+    excepción para interrumpir la carga. Con ``lazy=None`` los archivos de
+    más de ``LAZY_THRESHOLD_BYTES`` se abren sin precargar; en ese caso la
+    pirámide no se construye aquí (ver ``finish_lazy_signal``). Si se pasa
+    una ``DiskCache`` y el archivo ya fue procesado con el mismo filtro, se
+    devuelve ``(None, señal)`` con la señal abierta como memmap.
+    """
+    progress = progress or _no_progress
+    key = None
+    if cache is not None:
+        key = cache.key_for(path, l_freq, h_freq, progress=lambda p, m: progress(p // 10, m))
+        with stage('cache.abrir'):
+            cached = load_cached_signal(cache, key)
+        if cached is not None:
+            progress(100, "Listo")
+            return None, cached
+
+    if lazy is None:
+        lazy = os.path.getsize(path) > LAZY_THRESHOLD_BYTES
+
+    progress(10, "Leyendo archivo EDF")
+    with stage('edf.decodificar') as etapa:
+        raw = mne.io.read_raw_edf(path, preload=not lazy, stim_channel='auto', verbose=verbose)
+        if etapa and raw.preload:
+            etapa.nbytes += raw._data.nbytes
+    if lazy:
+        signal = LazySignalModel(raw, l_freq, h_freq)
+        signal.cache_key = key
+        return raw, signal
+
+    # Filtrar canal por canal para poder informar el avance y cancelar entre canales
+    n_canales = len(raw.ch_names)
+    for i in range(n_canales):
+        progress(20 + 60 * i // n_canales, f"Filtrando canal {raw.ch_names[i]}")
+        with stage('edf.filtrar', nbytes=raw._data[i].nbytes):
+            raw.filter(l_freq=l_freq, h_freq=h_freq, picks=[i], verbose=verbose)
+
+    progress(80, "Preparando gráficos")
+    signal = SignalModel.from_raw(raw)
+    signal.build_pyramids()
+    signal.cache_key = key
+    if cache is not None:
+        progress(90, "Guardando en caché")
+        try:
+            with stage('cache.guardar', nbytes=signal.data.nbytes):
+                store_signal(cache, key, signal)
+        except OSError:
+            pass  # sin espacio o sin permisos: se sigue sin caché
+    progress(100, "Listo")
+    return raw, signal
@@ -0,0 +1,126 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import get_window
+
+from telemetry import add_bytes, stage
+
+
+# Muestras por tramo al recorrer la señal para la PSD (acota la memoria en modo diferido)
+PSD_CHUNK = 1 << 20
+
+
+def welch_psd(signal, n_fft=2048, progress=None):
+    """PSD de Welch (V²/Hz) de todos los canales, de 0 Hz a Nyquist.
+
+    Equivale a ``psd_array_welch`` con sus valores por defecto (segmentos de
+    ``n_fft`` muestras sin solapamiento, ventana de Hamming, sin DC), pero
+    recorre la señal por tramos y acumula los espectros, de modo que nunca
+    tiene más de ``PSD_CHUNK`` muestras por canal en memoria.
+    """
+    n_segmentos = signal.n_times // n_fft
+    if n_segmentos == 0:
+        raise ValueError("La grabación es más corta que la ventana de la FFT.")
+    ventana = get_window('hamming', n_fft)
+    total = np.zeros((len(signal.ch_names), n_fft // 2 + 1))
+    paso = n_fft * max(1, PSD_CHUNK // n_fft)
+    fin = n_segmentos * n_fft
+    for inicio in range(0, fin, paso):
+        if progress:
+            progress(100 * inicio // fin, "Calculando espectros")
+        x = np.asarray(signal.read(inicio, min(inicio + paso, fin)))
+        with stage('psd'):
+            segmentos = x.reshape(x.shape[0], -1, n_fft)
+            segmentos = segmentos - segmentos.mean(axis=-1, keepdims=True)
+            espectro = np.fft.rfft(segmentos * ventana, axis=-1)
+            total += (espectro.real ** 2 + espectro.imag ** 2).sum(axis=1)
+            # Segmentos centrados, con ventana y su espectro
+            add_bytes(2 * segmentos.nbytes + espectro.nbytes)
+
+    psd = total / (n_segmentos * signal.sfreq * np.sum(ventana ** 2))
+    psd[:, 1:(n_fft + 1) // 2] *= 2
+    return np.fft.rfftfreq(n_fft, d=1 / signal.sfreq), psd
+
+
+def signal_psd(signal, n_fft=2048, cache=None, progress=None):
+    """PSD completa de todos los canales, calculada una sola vez por señal y ``n_fft``.
+
+    El resultado queda en ``signal.psds`` y, si hay caché, en la entrada de
+    la señal, de donde ``load_cached_signal`` lo recupera en la próxima carga.
+    """
+    if n_fft not in signal.psds:
+        freqs, psd = welch_psd(signal, n_fft, progress)
+        signal.psds[n_fft] = (freqs, psd)
+        if cache is not None and signal.cache_key is not None:
+            try:
+                cache.add_arrays(signal.cache_key, {f'psd{n_fft}_freqs': freqs, f'psd{n_fft}': psd})
+            except OSError:
+                pass
+    return signal.psds[n_fft]
+
+
+def compute_psd(signal, fmin=0.0, fmax=np.inf, n_fft=2048, picks=None, cache=None, progress=None):
+    """Recorte [fmin, fmax] de la PSD de ``signal_psd``; cambiar el rango no recalcula nada.
+
+    Devuelve ``(frecuencias, psd)`` con ``psd`` de forma (n_canales, n_frecuencias).
+    """
+    freqs, psd = signal_psd(signal, n_fft, cache, progress)
+    mascara = (freqs >= fmin) & (freqs <= fmax)
+    if picks is not None:
+        psd = psd[picks]
+    return freqs[mascara], psd[:, mascara]
+
+
+def channel_psd(signal, name, fmin, fmax, n_fft=2048, cache=None, progress=None):
+    """PSD de Welch de un canal, en dB (µV²/Hz) como ``raw.plot_psd``."""
+    freqs, psd = compute_psd(signal, fmin, fmax, n_fft, [signal.channel_index(name)], cache, progress)
+    return freqs, 10 * np.log10(psd[0] * 1e12)
+
+
+def stft_spectrogram(x, sfreq, window_seconds=1.0, hop_seconds=0.25, batch=4096):
+    """Espectrograma de potencia por STFT (ventana de Hann) sobre el último eje de ``x``.
+
+    Los segmentos son vistas de ``x`` (``sliding_window_view``) y se
+    transforman en lotes de ``batch`` segmentos con un único ``rfft``, de
+    modo que la memoria crece linealmente con la duración de ``x``.
+    Devuelve ``(tiempos, frecuencias, potencia)`` con ``potencia`` de forma
+    ``x.shape[:-1] + (n_frecuencias, n_segmentos)`` en V²/Hz.
+    """
+    nperseg = int(round(window_seconds * sfreq))
+    hop = int(round(hop_seconds * sfreq))
+    if nperseg < 2:
+        raise ValueError("La ventana debe abarcar al menos dos muestras.")
+    if hop < 1:
+        raise ValueError("El paso debe abarcar al menos una muestra.")
+    if x.shape[-1] < nperseg:
+        raise ValueError("El rango de tiempo es más corto que la ventana.")
+
+    ventana = get_window('hann', nperseg)
+    escala = 1.0 / (sfreq * np.sum(ventana ** 2))
+    segmentos = sliding_window_view(x, nperseg, axis=-1)[..., ::hop, :]
+    n_segmentos = segmentos.shape[-2]
+    frecuencias = np.fft.rfftfreq(nperseg, d=1 / sfreq)
+
+    with stage('fft') as etapa:
+        potencia = np.empty(x.shape[:-1] + (n_segmentos, len(frecuencias)))
+        for inicio in range(0, n_segmentos, batch):
+            lote = segmentos[..., inicio:inicio + batch, :]
+            espectro = np.fft.rfft(lote * ventana, axis=-1)
+            potencia[..., inicio:inicio + batch, :] = espectro.real ** 2 + espectro.imag ** 2
+            if etapa:
+                etapa.nbytes += lote.size * ventana.itemsize + espectro.nbytes
+        add_bytes(potencia.nbytes)
+
+    # Espectro de un solo lado: se duplica todo salvo DC (y Nyquist si nperseg es par)
+    potencia *= escala
+    potencia[..., 1:(nperseg + 1) // 2] *= 2
+    tiempos = (np.arange(n_segmentos) * hop + nperseg / 2) / sfreq
+    return tiempos, frecuencias, np.swapaxes(potencia, -1, -2)
+
+
+def channel_spectrogram(signal, name, start, stop, window_seconds, hop_seconds, progress=None):
+    """Espectrograma en dB (µV²/Hz) de la ventana [start, stop) de un canal."""
+    if progress:
+        progress(0, f"Calculando espectrograma de {name}")
+    tiempos, frecuencias, potencia = stft_spectrogram(signal.window(name, start, stop), signal.sfreq,
+                                                      window_seconds, hop_seconds)
+    return tiempos + start / signal.sfreq, frecuencias, 10 * np.log10(potencia * 1e12 + np.finfo(float).tiny)
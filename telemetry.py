@@ -0,0 +1,297 @@
+"""Tiempos por etapa, memoria y bytes copiados de cada interacción.
+
+Las etapas del recorrido (decodificar el EDF, filtrar, ``get_data``, PSD,
+FFT, dibujar, ...) se envuelven con ``stage``::
+
+    with stage('psd', nbytes=x.nbytes):
+        ...
+
+Con la telemetría desactivada (por defecto) ``stage`` devuelve siempre el
+mismo contexto vacío, sin tomar tiempos ni memoria. Activada (desde la
+interfaz o con ``BRAINBIT_PERFIL=1``) cada etapa guarda su duración, el
+hilo que la ejecutó, los bytes que copió y la memoria del proceso (RSS
+actual y pico). Las etapas se agrupan en interacciones (``begin``: cargar
+un archivo, graficar, exportar, ...) y se pueden guardar como JSON o como
+traza de Chrome (``chrome://tracing`` o Perfetto). Con ``profile`` se
+captura además un cProfile por interacción, en todos los hilos que la
+ejecutan: hasta Python 3.11 con un perfilador por hilo; desde 3.12 sólo
+puede haber uno activo, y el de la interfaz ya ve las llamadas de todos
+los hilos.
+"""
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+    _PROCESS = None
+else:
+    _PROCESS = psutil.Process()
+
+# Etapas que se conservan; las más viejas se descartan
+MAX_RECORDS = 20000
+
+# Desde 3.12 cProfile usa sys.monitoring: un único perfilador activo, que abarca todos los hilos
+SINGLE_PROFILER = sys.version_info >= (3, 12)
+
+_NULL = nullcontext()
+
+
+def _peak_rss():
+    # Máximo histórico del proceso; getrusage es mucho más barato que psutil
+    if resource is not None:
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maximo if sys.platform == 'darwin' else maximo * 1024
+    if _PROCESS is not None:
+        return getattr(_PROCESS.memory_info(), 'peak_wset', 0)  # Windows
+    return 0
+
+
+def _rss_bytes():
+    """``(rss actual, pico de rss)`` del proceso; 0 si no se puede medir."""
+    actual = _PROCESS.memory_info().rss if _PROCESS is not None else 0
+    return actual, max(_peak_rss(), actual)
+
+
+class _Stage:
+    __slots__ = ('telemetry', 'name', 'nbytes', 'start', 'peak_before')
+
+    def __init__(self, telemetry, name, nbytes):
+        self.telemetry = telemetry
+        self.name = name
+        self.nbytes = nbytes
+
+    def __enter__(self):
+        self.telemetry._stack().append(self)
+        self.peak_before = _peak_rss()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        fin = time.perf_counter()
+        self.telemetry._stack().pop()
+        self.telemetry._record(self, fin)
+        return False
+
+
+class Telemetry:
+    """Registro de etapas e interacciones, compartido por todos los hilos."""
+
+    def __init__(self, enabled=False, max_records=MAX_RECORDS):
+        self.enabled = enabled
+        self.profile = False
+        self.records = deque(maxlen=max_records)
+        self.recorded = 0  # etapas registradas desde el inicio; sigue creciendo cuando records ya está lleno
+        self.interactions = deque(maxlen=max_records)
+        self.origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._current = None
+        self._next_id = 0
+        self._profilers = {}  # id de interacción -> [cProfile.Profile]
+        self._main_profiler = None
+
+    def _stack(self):
+        pila = getattr(self._local, 'stack', None)
+        if pila is None:
+            pila = self._local.stack = []
+        return pila
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if not enabled:
+            self._stop_main_profiler()
+
+    def stage(self, name, nbytes=0):
+        if not self.enabled:
+            return _NULL
+        return _Stage(self, name, nbytes)
+
+    def add_bytes(self, nbytes):
+        # Suma a la etapa más interna del hilo actual
+        if self.enabled:
+            pila = self._stack()
+            if pila:
+                pila[-1].nbytes += int(nbytes)
+
+    def begin(self, name):
+        """Empieza una interacción; las etapas que siguen (en cualquier hilo) quedan en ella."""
+        if not self.enabled:
+            return None
+        self._stop_main_profiler()
+        with self._lock:
+            self._next_id += 1
+            interaccion = {'id': self._next_id, 'name': name, 'start': time.perf_counter() - self.origin}
+            self.interactions.append(interaccion)
+            self._current = interaccion['id']
+        if self.profile:
+            self._main_profiler = self._start_profiler(self._current)
+        return self._current
+
+    def thread_profile(self):
+        """Contexto para los trabajos en otros hilos: los suma al cProfile de la interacción actual."""
+        if not (self.enabled and self.profile) or self._current is None or SINGLE_PROFILER:
+            return _NULL
+        return _ThreadProfile(self, self._current)
+
+    def _start_profiler(self, interaccion):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            return None  # hay otro perfilador activo (un depurador, por ejemplo)
+        with self._lock:
+            self._profilers.setdefault(interaccion, []).append(profiler)
+        return profiler
+
+    def _stop_main_profiler(self):
+        if self._main_profiler is not None:
+            self._main_profiler.disable()
+            self._main_profiler = None
+
+    def _record(self, etapa, fin):
+        actual, pico = _rss_bytes()
+        hilo = threading.current_thread()
+        registro = {
+            'name': etapa.name,
+            'interaction': self._current,
+            'thread': hilo.name,
+            'tid': hilo.ident,
+            'start': etapa.start - self.origin,
+            'duration': fin - etapa.start,
+            'bytes': int(etapa.nbytes),
+            'rss': actual,
+            'peak_rss': pico,
+            'peak_growth': pico - etapa.peak_before,
+        }
+        with self._lock:
+            self.records.append(registro)
+            self.recorded += 1
+
+    def clear(self):
+        self._stop_main_profiler()
+        with self._lock:
+            self.records.clear()
+            self.interactions.clear()
+            self._profilers.clear()
+            self._current = None
+
+    def last_interaction(self):
+        with self._lock:
+            return self.interactions[-1] if self.interactions else None
+
+    def stages(self, interaction=None):
+        with self._lock:
+            registros = list(self.records)
+        if interaction is None:
+            return registros
+        return [r for r in registros if r['interaction'] == interaction]
+
+    def summary(self, interaction=None):
+        """Por etapa: ``{nombre: {'count', 'total_s', 'max_s', 'bytes', 'peak_rss'}}`` en orden de aparición."""
+        resumen = {}
+        for r in self.stages(interaction):
+            s = resumen.setdefault(r['name'], {'count': 0, 'total_s': 0.0, 'max_s': 0.0, 'bytes': 0, 'peak_rss': 0})
+            s['count'] += 1
+            s['total_s'] += r['duration']
+            s['max_s'] = max(s['max_s'], r['duration'])
+            s['bytes'] += r['bytes']
+            s['peak_rss'] = max(s['peak_rss'], r['peak_rss'])
+        return resumen
+
+    def dump_json(self, path):
+        with self._lock:
+            interacciones = list(self.interactions)
+        with open(path, 'w') as f:
+            json.dump({'pid': os.getpid(), 'interactions': interacciones, 'stages': self.stages(),
+                       'summary': self.summary()}, f, indent=1)
+        return path
+
+    def dump_chrome_trace(self, path):
+        """Formato Trace Event: una barra por etapa y una marca por interacción."""
+        pid = os.getpid()
+        eventos = []
+        hilos = {}
+        for r in self.stages():
+            hilos[r['tid']] = r['thread']
+            eventos.append({'name': r['name'], 'cat': 'etapa', 'ph': 'X', 'pid': pid, 'tid': r['tid'],
+                            'ts': r['start'] * 1e6, 'dur': r['duration'] * 1e6,
+                            'args': {'bytes': r['bytes'], 'rss': r['rss'], 'peak_rss': r['peak_rss'],
+                                     'interaction': r['interaction']}})
+        with self._lock:
+            interacciones = list(self.interactions)
+        principal = threading.main_thread().ident
+        for i in interacciones:
+            eventos.append({'name': i['name'], 'cat': 'interaccion', 'ph': 'i', 's': 'p', 'pid': pid,
+                            'tid': principal, 'ts': i['start'] * 1e6})
+        for tid, nombre in hilos.items():
+            eventos.append({'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': nombre}})
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': eventos, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    def dump_profile(self, path, interaction=None):
+        """Guarda el cProfile de una interacción (la última por defecto) para ``pstats`` o snakeviz."""
+        if interaction is None:
+            ultima = self.last_interaction()
+            interaction = ultima and ultima['id']
+        if interaction == self._current:
+            self._stop_main_profiler()
+        with self._lock:
+            profilers = list(self._profilers.get(interaction, []))
+        if not profilers:
+            raise ValueError("No hay un cProfile de esa interacción; active la captura antes de repetirla.")
+        stats = pstats.Stats(profilers[0])
+        for profiler in profilers[1:]:
+            stats.add(profiler)
+        stats.dump_stats(path)
+        return path
+
+
+class _ThreadProfile:
+    __slots__ = ('telemetry', 'interaction', 'profiler')
+
+    def __init__(self, telemetry, interaction):
+        self.telemetry = telemetry
+        self.interaction = interaction
+
+    def __enter__(self):
+        self.profiler = self.telemetry._start_profiler(self.interaction)
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.disable()
+        return False
+
+
+TELEMETRY = Telemetry(enabled=os.environ.get('BRAINBIT_PERFIL', '') not in ('', '0'))
+
+
+def stage(name, nbytes=0):
+    return TELEMETRY.stage(name, nbytes)
+
+
+def add_bytes(nbytes):
+    TELEMETRY.add_bytes(nbytes)
+
+
+def format_bytes(n):
+    for unidad in ('B', 'KB', 'MB'):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unidad}"
+        n /= 1024
+    return f"{n:.1f} GB"
@@ -0,0 +1,128 @@
+import importlib
+import threading
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from telemetry import TELEMETRY
+
+
+class Cancelled(Exception):
+    pass
+
+
+class JobSignals(QObject):
+    progress = pyqtSignal(int, str)
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    done = pyqtSignal()
+
+
+class Job(QRunnable):
+    """Trabajo ejecutado en el pool de hilos.
+
+    La función recibe ``job.report`` como callback de progreso; al llamarlo
+    después de ``cancel()`` se lanza ``Cancelled`` y el trabajo termina sin
+    emitir resultado.
+    """
+
+    def __init__(self, fn, *args, name='trabajo', **kwargs):
+        super().__init__()
+        self.fn = fn
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = JobSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def is_cancelled(self):
+        return self._cancelled.is_set()
+
+    def report(self, percent, message=""):
+        if self.is_cancelled():
+            raise Cancelled()
+        self.signals.progress.emit(int(percent), message)
+
+    def run(self):
+        try:
+            with TELEMETRY.stage('trabajo.' + self.name), TELEMETRY.thread_profile():
+                result = self.fn(*self.args, progress=self.report, **self.kwargs)
+        except Cancelled:
+            pass
+        except Exception as e:
+            if not self.is_cancelled():
+                self.signals.failed.emit(str(e))
+        else:
+            if not self.is_cancelled():
+                self.signals.finished.emit(result)
+        finally:
+            self.signals.done.emit()
+
+
+class JobRunner(QObject):
+    """Lanza trabajos en segundo plano, uno activo por ranura ("load", "analysis", ...).
+
+    Enviar un trabajo a una ranura ocupada cancela el anterior, y los
+    resultados que llegan de un trabajo que ya no es el actual se descartan.
+    Los callbacks se ejecutan en el hilo de la interfaz.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.current = {}
+        # Referencias a todos los trabajos en ejecución, incluidos los cancelados,
+        # para que sus señales sigan vivas hasta que el hilo termine
+        self.running = set()
+
+    def submit(self, slot, fn, *args, on_done=None, on_error=None, on_progress=None, **kwargs):
+        self.cancel(slot)
+        job = Job(fn, *args, name=slot, **kwargs)
+        self.current[slot] = job
+        self.running.add(job)
+        job.signals.done.connect(lambda: self.running.discard(job))
+        job.signals.finished.connect(lambda result: self._deliver(slot, job, on_done, result))
+        job.signals.failed.connect(lambda message: self._deliver(slot, job, on_error, message))
+        if on_progress is not None:
+            job.signals.progress.connect(lambda percent, message: self._is_current(slot, job) and on_progress(percent, message))
+        self.pool.start(job)
+        return job
+
+    def cancel(self, slot=None):
+        slots = list(self.current) if slot is None else [slot]
+        for s in slots:
+            job = self.current.pop(s, None)
+            if job is not None:
+                job.cancel()
+
+    def is_busy(self, slot=None):
+        return bool(self.current) if slot is None else slot in self.current
+
+    def _is_current(self, slot, job):
+        return self.current.get(slot) is job
+
+    def _deliver(self, slot, job, callback, value):
+        if not self._is_current(slot, job):
+            return  # resultado obsoleto
+        del self.current[slot]
+        if callback is not None:
+            callback(value)
+
+
+def preload_modules(names):
+    """Importa ``names`` en un hilo aparte para que estén listos cuando se usen.
+
+    El hilo es daemon: no demora el cierre si la precarga no terminó.
+    """
+    def importar():
+        for nombre in names:
+            try:
+                importlib.import_module(nombre)
+            except ImportError:
+                pass
+
+    hilo = threading.Thread(target=importar, name='precarga', daemon=True)
+    hilo.start()
+    return hilo